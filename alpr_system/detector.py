@@ -3,16 +3,113 @@ import cv2
 import numpy as np
 from ultralytics import YOLO
 import os
+import threading
 import torch
 
+# TensorRT is optional; when present on a CUDA machine the detector is
+# exported to a cached engine on first load
+try:
+    import tensorrt  # noqa: F401
+    TENSORRT_AVAILABLE = True
+except ImportError:
+    TENSORRT_AVAILABLE = False
+
+# ONNX Runtime is optional; when present on a CPU-only machine the detector
+# is exported to a cached ONNX model on first load
+try:
+    import onnxruntime  # noqa: F401
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
 # Global variable to cache the model
 _yolo_model = None
+_yolo_model_lock = threading.Lock()
+
+# Reusable pinned host buffer for uploading frame batches to the GPU
+_pinned_buffer = None
+_pinned_buffer_lock = threading.Lock()
+
+# Inference device; FP16 is only worthwhile (and supported) on CUDA
+_DEVICE = 'cuda' if torch.cuda.is_available() else 'cpu'
+_USE_HALF = _DEVICE == 'cuda'
+
+# Number of frames sent to YOLO per forward pass when processing video.
+# Larger batches keep the GPU busy; on CPU they mostly amortize call overhead.
+DEFAULT_BATCH_SIZE = 16 if torch.cuda.is_available() else 4
+
+# Images whose longest side is at least this many pixels are detected on
+# full-resolution tiles instead of a single downscaled pass
+TILE_MIN_SIDE = 1280
+
+
+def _get_tensorrt_engine(model_path):
+    """
+    Return the path of a TensorRT engine for a YOLO ``.pt`` model.
+    
+    The engine is exported next to the weights on first use and reused
+    afterwards. Only applies on CUDA machines with TensorRT installed.
+    
+    Args:
+        model_path: Path to the PyTorch ``.pt`` weights
+    
+    Returns:
+        str: Path to the ``.engine`` file, or None if TensorRT cannot be used
+    """
+    if _DEVICE != 'cuda' or not TENSORRT_AVAILABLE or not model_path.endswith('.pt'):
+        return None
+    
+    engine_path = os.path.splitext(model_path)[0] + '.engine'
+    if os.path.exists(engine_path) and os.path.getmtime(engine_path) >= os.path.getmtime(model_path):
+        return engine_path
+    
+    try:
+        print(f"Exporting TensorRT engine: {engine_path}")
+        # Dynamic batch up to DEFAULT_BATCH_SIZE so single images and video batches share one engine
+        return YOLO(model_path).export(format='engine', imgsz=640, half=True, dynamic=True,
+                                       batch=DEFAULT_BATCH_SIZE, workspace=4, verbose=False)
+    except Exception as e:
+        print(f"TensorRT export failed, using PyTorch model: {str(e)}")
+        return None
+
+
+def _get_onnx_model(model_path):
+    """
+    Return the path of an ONNX export of a YOLO ``.pt`` model.
+    
+    ONNX Runtime fuses the graph and runs it faster than PyTorch eager mode
+    on CPU. The model is exported next to the weights on first use and
+    reused afterwards. Only applies on CPU machines with ONNX Runtime.
+    
+    Args:
+        model_path: Path to the PyTorch ``.pt`` weights
+    
+    Returns:
+        str: Path to the ``.onnx`` file, or None if ONNX Runtime cannot be used
+    """
+    if _DEVICE != 'cpu' or not ONNXRUNTIME_AVAILABLE or not model_path.endswith('.pt'):
+        return None
+    
+    onnx_path = os.path.splitext(model_path)[0] + '.onnx'
+    if os.path.exists(onnx_path) and os.path.getmtime(onnx_path) >= os.path.getmtime(model_path):
+        return onnx_path
+    
+    try:
+        print(f"Exporting ONNX model: {onnx_path}")
+        # Dynamic shapes so single images, tiles and video batches share one model
+        return YOLO(model_path).export(format='onnx', imgsz=640, dynamic=True, verbose=False)
+    except Exception as e:
+        print(f"ONNX export failed, using PyTorch model: {str(e)}")
+        return None
 
 
 def get_yolo_model():
     """
     Load or return cached license plate YOLO model.
     
+    The first load is single-flight: concurrent callers (e.g. several
+    Streamlit sessions) wait for one load instead of each reading the weights.
+    
     Returns:
         YOLO: YOLOv8 model instance for license plate detection
     """
@@ -21,39 +118,187 @@ def get_yolo_model():
     if _yolo_model is not None:
         return _yolo_model
     
-    try:
-        # Use license plate-specific YOLOv8 model
-        # Located in models/ directory at project root
-        import os
-        
-        # Determine the path to the license plate model
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        project_root = os.path.dirname(current_dir)
-        model_path = os.path.join(project_root, "models", "license_plate_detector.pt")
-        
-        # Fallback to relative path if absolute path doesn't work
-        if not os.path.exists(model_path):
-            model_path = "models/license_plate_detector.pt"
-        
-        # If still not found, check for yolov8n.pt in models directory
-        if not os.path.exists(model_path):
-            alt_path = os.path.join(project_root, "models", "yolov8n.pt")
-            if os.path.exists(alt_path):
-                model_path = alt_path
-                print("License plate model not found, using YOLOv8n as fallback")
-        
-        print(f"Loading license plate detector model: {model_path}")
-        _yolo_model = YOLO(model_path)
-        
-        # Set to evaluation mode
-        _yolo_model.eval()
+    with _yolo_model_lock:
+        # Another thread may have finished loading while we waited
+        if _yolo_model is not None:
+            return _yolo_model
+        
+        try:
+            # Use license plate-specific YOLOv8 model
+            # Located in models/ directory at project root
+            
+            # Determine the path to the license plate model
+            current_dir = os.path.dirname(os.path.abspath(__file__))
+            project_root = os.path.dirname(current_dir)
+            model_path = os.path.join(project_root, "models", "license_plate_detector.pt")
+            
+            # Fallback to relative path if absolute path doesn't work
+            if not os.path.exists(model_path):
+                model_path = "models/license_plate_detector.pt"
+            
+            # If still not found, check for yolov8n.pt in models directory
+            if not os.path.exists(model_path):
+                alt_path = os.path.join(project_root, "models", "yolov8n.pt")
+                if os.path.exists(alt_path):
+                    model_path = alt_path
+                    print("License plate model not found, using YOLOv8n as fallback")
+            
+            # Prefer a cached TensorRT engine on CUDA, or an ONNX model on CPU
+            exported_path = _get_tensorrt_engine(model_path) or _get_onnx_model(model_path)
+            
+            if exported_path:
+                print(f"Loading exported license plate detector: {exported_path}")
+                model = YOLO(exported_path, task='detect')
+            else:
+                print(f"Loading license plate detector model: {model_path}")
+                model = YOLO(model_path)
+                
+                # Fuse Conv+BN layers and keep the weights resident on the inference device
+                model.model.fuse(verbose=False)
+                model.to(_DEVICE)
+                if _USE_HALF:
+                    model.model.half()
+                
+                # Set to evaluation mode
+                model.eval()
+            
+            # Publish only the fully initialised model to other threads
+            _yolo_model = model
+            
+            print("License plate detector model loaded successfully")
+            return _yolo_model
         
-        print("License plate detector model loaded successfully")
-        return _yolo_model
+        except Exception as e:
+            print(f"Error loading license plate model: {str(e)}")
+            raise
+
+
+def _run_inference(source, conf=0.3):
+    """
+    Run the cached YOLO model on an image or a list of images.
     
-    except Exception as e:
-        print(f"Error loading license plate model: {str(e)}")
-        raise
+    Args:
+        source: Input image (BGR format) or list of images
+        conf: Confidence threshold
+    
+    Returns:
+        list: Ultralytics ``Results`` objects, one per input image
+    """
+    model = get_yolo_model()
+    
+    predict_kwargs = {'conf': conf, 'device': _DEVICE, 'verbose': False}
+    if _USE_HALF:
+        predict_kwargs['half'] = True
+    
+    # No autograd bookkeeping (graph or tensor version counters) for detection
+    with torch.inference_mode():
+        return model(source, **predict_kwargs)
+
+
+def _select_best_box(boxes, confidences):
+    """
+    Pick the most plate-like box by confidence and aspect ratio.
+    
+    License plates are typically between 1.5-8 times wider than tall; boxes in
+    that range are scored by ``conf * (1 + |aspect_ratio - 3.5| / 10)``.
+    
+    Args:
+        boxes: (N, 4) array of xyxy boxes
+        confidences: (N,) array of confidence scores
+    
+    Returns:
+        tuple: (index, score) of the selected box. Falls back to (0, 0) when
+               no box has a plate-like aspect ratio.
+    """
+    w = boxes[:, 2] - boxes[:, 0]
+    h = boxes[:, 3] - boxes[:, 1]
+    aspect_ratio = np.divide(w, h, out=np.zeros_like(w), where=h > 0)
+    
+    # Basic plate-like shape filtering
+    plate_like = (aspect_ratio > 1.5) & (aspect_ratio < 8.0)
+    scores = np.where(plate_like, confidences * (1 + np.abs(aspect_ratio - 3.5) / 10), 0)
+    
+    best_index = int(np.argmax(scores))
+    if scores[best_index] <= 0:
+        return 0, 0
+    
+    return best_index, float(scores[best_index])
+
+
+def _extract_best_plate(image, detections):
+    """
+    Pick the most plate-like detection from a YOLO result and crop it.
+    
+    Args:
+        image: Image the detections were produced from (BGR format)
+        detections: Single Ultralytics ``Results`` object for ``image``
+    
+    Returns:
+        tuple: (plate_region, bounding_box), or (None, None) if nothing was detected
+    """
+    # Find the largest detection (most likely to be a license plate)
+    if detections.boxes is None or len(detections.boxes) == 0:
+        return None, None
+    
+    # Single device-to-host copy of [x1, y1, x2, y2, conf, cls] rows
+    data = detections.boxes.data.cpu().numpy()
+    
+    return _crop_best_box(image, data[:, :4], data[:, 4])
+
+
+def _clip_and_pad_boxes(boxes, image_shape, padding=5):
+    """
+    Convert xyxy boxes to integer pixel coordinates, clipped and padded.
+    
+    Each box is truncated to ints, clipped to the image, then grown by
+    ``padding`` pixels on every side (still within the image).
+    
+    Args:
+        boxes: (N, 4) array of xyxy boxes
+        image_shape: Shape of the image the boxes refer to
+        padding: Padding in pixels
+    
+    Returns:
+        np.ndarray: (N, 4) int array of padded xyxy boxes
+    """
+    h, w = image_shape[:2]
+    boxes = boxes.astype(int)
+    
+    # Ensure coordinates are within bounds, then add padding
+    x1 = np.maximum(np.maximum(boxes[:, 0], 0) - padding, 0)
+    y1 = np.maximum(np.maximum(boxes[:, 1], 0) - padding, 0)
+    x2 = np.minimum(np.minimum(boxes[:, 2], w) + padding, w)
+    y2 = np.minimum(np.minimum(boxes[:, 3], h) + padding, h)
+    
+    return np.stack([x1, y1, x2, y2], axis=1)
+
+
+def _crop_best_box(image, boxes, confidences):
+    """
+    Crop the most plate-like box (with padding) out of an image.
+    
+    Args:
+        image: Image the boxes refer to (BGR format)
+        boxes: (N, 4) array of xyxy boxes in ``image`` coordinates
+        confidences: (N,) array of confidence scores
+    
+    Returns:
+        tuple: (plate_region, bounding_box), or (None, None) if there are no boxes
+    """
+    if len(boxes) == 0:
+        return None, None
+    
+    # Take the most plate-like detection (first box if none look like a plate)
+    best_index, _ = _select_best_box(boxes, confidences)
+    
+    # Clip to the image and add small padding
+    x1, y1, x2, y2 = _clip_and_pad_boxes(boxes[best_index:best_index + 1], image.shape)[0].tolist()
+    
+    # Extract plate region
+    plate_region = image[y1:y2, x1:x2]
+    
+    # Return region and bounding box in (x, y, w, h) format
+    return plate_region, (x1, y1, x2 - x1, y2 - y1)
 
 
 def detect_plate_region(image):
@@ -78,79 +323,277 @@ def detect_plate_region(image):
             print("Error: Could not convert image to OpenCV format")
             return None, None
         
-        model = get_yolo_model()
-        
         # Run inference with confidence threshold
-        results = model(image, conf=0.3, verbose=False)
+        results = _run_inference(image, conf=0.3)
         
         if not results or len(results) == 0:
             return None, None
         
-        detections = results[0]
+        return _extract_best_plate(image, results[0])
+    
+    except Exception as e:
+        print(f"Error in YOLO detection: {str(e)}")
+        return None, None
+
+
+def _get_pinned_buffer(shape):
+    """
+    Return a pinned (page-locked) uint8 host tensor of the given shape.
+    
+    The backing allocation is kept between calls and only grows, so video
+    batches of the same size reuse one buffer instead of pinning new memory
+    every time.
+    
+    Args:
+        shape: Required tensor shape, e.g. (batch, height, width, 3)
+    
+    Returns:
+        torch.Tensor: View of the shared pinned buffer with ``shape``
+    """
+    global _pinned_buffer
+    
+    numel = int(np.prod(shape))
+    if _pinned_buffer is None or _pinned_buffer.numel() < numel:
+        _pinned_buffer = torch.empty(numel, dtype=torch.uint8, pin_memory=True)
+    
+    return _pinned_buffer[:numel].view(shape)
+
+
+def preprocess_frames(frames, max_width=800, max_height=600):
+    """
+    Resize a batch of video frames to fit within max dimensions.
+    
+    Equivalent to calling utils.resize_image() on every frame, but when CUDA
+    is available frames that share a size are stacked and downscaled on the
+    GPU in a single call instead of one CPU resize per frame.
+    
+    Args:
+        frames: List of frames (BGR format)
+        max_width: Maximum width
+        max_height: Maximum height
+    
+    Returns:
+        list: Resized frames as uint8 numpy arrays, in order
+    """
+    from . import utils
+    
+    if not frames:
+        return []
+    
+    same_shape = all(frame.shape == frames[0].shape for frame in frames)
+    if _DEVICE != 'cuda' or not same_shape:
+        return [utils.resize_image(frame, max_width=max_width, max_height=max_height) for frame in frames]
+    
+    h, w = frames[0].shape[:2]
+    scale = min(max_width / w, max_height / h, 1.0)
+    new_w = int(w * scale)
+    new_h = int(h * scale)
+    
+    if (new_w, new_h) == (w, h):
+        return list(frames)
+    
+    # Stage the frames in pinned host memory so the upload can run as an async DMA;
+    # the buffer is shared, so hold it until the result is back on the host
+    with _pinned_buffer_lock, torch.inference_mode():
+        staging = _get_pinned_buffer((len(frames),) + frames[0].shape)
+        np.stack(frames, out=staging.numpy())
+        
+        # NHWC uint8 -> NCHW float on device; antialiased bilinear closely tracks cv2.INTER_AREA
+        batch = staging.to(_DEVICE, non_blocking=True).permute(0, 3, 1, 2).float()
+        resized = torch.nn.functional.interpolate(batch, size=(new_h, new_w), mode='bilinear',
+                                                  align_corners=False, antialias=True)
+        resized = resized.round_().clamp_(0, 255).to(torch.uint8).permute(0, 2, 3, 1).contiguous().cpu().numpy()
+    
+    return list(resized)
+
+
+def _result_rows(result):
+    """
+    Return the [x1, y1, x2, y2, conf, cls] rows of one YOLO result as a numpy array.
+    
+    Args:
+        result: Single Ultralytics ``Results`` object
+    
+    Returns:
+        np.ndarray: (N, 6) array, empty when nothing was detected
+    """
+    if result.boxes is None:
+        return np.empty((0, 6), dtype=np.float32)
+    return result.boxes.data.cpu().numpy()
+
+
+def _map_boxes(data, offset, scale=1.0):
+    """
+    Map detection rows from an inference input onto the full image.
+    
+    Args:
+        data: (N, 5+) array of [x1, y1, x2, y2, conf, ...] rows in the input's coordinates
+        offset: (x_offset, y_offset) of the input within the full image
+        scale: Full-image pixels per input pixel
+    
+    Returns:
+        np.ndarray: (N, 5) float32 array of [x1, y1, x2, y2, conf] rows in full-image coordinates
+    """
+    x_offset, y_offset = offset
+    rows = data[:, :5].astype(np.float32)
+    rows[:, :4] = rows[:, :4] * scale + np.array([x_offset, y_offset, x_offset, y_offset], dtype=np.float32)
+    return rows
+
+
+def _drop_fragments(rows, containers, max_inside=0.5):
+    """
+    Drop boxes that mostly lie inside one of the container boxes.
+    
+    A plate larger than a tile shows up in the tiles only in pieces; once
+    the whole-image pass has found the plate, those pieces (and tile boxes
+    that repeat it) are not separate detections.
+    
+    Args:
+        rows: (N, 5) array of [x1, y1, x2, y2, conf] rows
+        containers: (M, 5) array of rows to test against
+        max_inside: Largest fraction of a box's area that may lie inside a container
+    
+    Returns:
+        np.ndarray: The rows of ``rows`` that are kept
+    """
+    if len(rows) == 0 or len(containers) == 0:
+        return rows
+    
+    # Intersection of every row with every container, as a fraction of the row's area
+    x1 = np.maximum(rows[:, None, 0], containers[None, :, 0])
+    y1 = np.maximum(rows[:, None, 1], containers[None, :, 1])
+    x2 = np.minimum(rows[:, None, 2], containers[None, :, 2])
+    y2 = np.minimum(rows[:, None, 3], containers[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = (rows[:, 2] - rows[:, 0]) * (rows[:, 3] - rows[:, 1])
+    inside = inter.max(axis=1) / np.maximum(area, 1e-6)
+    
+    return rows[inside <= max_inside]
+
+
+def _merge_detections(rows, nms_threshold=0.5):
+    """
+    Merge duplicate detections of the same plate with NMS.
+    
+    Args:
+        rows: (N, 5) array of [x1, y1, x2, y2, conf] rows in one coordinate frame
+        nms_threshold: IoU above which the lower-confidence box is dropped
+    
+    Returns:
+        tuple: (boxes, confidences) of the kept detections, highest confidence first
+    """
+    if len(rows) == 0:
+        return rows[:, :4], rows[:, 4]
+    
+    # Highest confidence first; overlapping lower-confidence boxes are dropped
+    xywh = np.column_stack([rows[:, :2], rows[:, 2:4] - rows[:, :2]])
+    keep = cv2.dnn.NMSBoxes(xywh.tolist(), rows[:, 4].tolist(), 0.3, nms_threshold)
+    keep = np.array(keep, dtype=int).flatten()
+    
+    return rows[keep, :4], rows[keep, 4]
+
+
+def detect_plate_region_tiled(image, tile_size=640, overlap=80):
+    """
+    Detect a license plate in a large image by running YOLO on tiles.
+    
+    Downscaling a very large photo to the 640px YOLO input can shrink
+    distant plates below what the detector can see, while a close-up plate
+    can be larger than any single tile. The image is therefore detected
+    once downscaled to one tile and again as overlapping tiles at native
+    resolution. Tile boxes that duplicate or are pieces of a whole-image
+    box are dropped and the rest are merged with NMS, so the tiles only add
+    detections to what the whole-image pass finds.
+    
+    Args:
+        image: Input image (BGR format from OpenCV, or PIL Image)
+        tile_size: Tile side length in pixels
+        overlap: Overlap between neighbouring tiles in pixels
+    
+    Returns:
+        tuple: (plate_region, bounding_box) in full-resolution coordinates.
+               Returns (None, None) if no plate detected
+    """
+    try:
+        from . import utils
         
-        # Find the largest detection (most likely to be a license plate)
-        if detections.boxes is None or len(detections.boxes) == 0:
+        # Ensure image is in OpenCV BGR format
+        image = utils.ensure_opencv_format(image)
+        if image is None:
+            print("Error: Could not convert image to OpenCV format")
             return None, None
         
-        # Get bounding boxes
-        boxes = detections.boxes.xyxy.cpu().numpy()
-        confidences = detections.boxes.conf.cpu().numpy()
+        # Whole image downscaled to one tile, detected on its own so it is
+        # letterboxed exactly like a single-image pass
+        overview = utils.resize_image(image, max_width=tile_size, max_height=tile_size)
+        overview_result = _run_inference(overview, conf=0.3)[0]
+        overview_rows = _map_boxes(_result_rows(overview_result), (0, 0), image.shape[1] / overview.shape[1])
+        
+        # Full-resolution tiles in batches of at most DEFAULT_BATCH_SIZE
+        # (the TensorRT engine's batch limit)
+        tiles = utils.tile_image(image, tile_size=tile_size, overlap=overlap)
+        tile_rows = []
+        for start in range(0, len(tiles), DEFAULT_BATCH_SIZE):
+            batch = tiles[start:start + DEFAULT_BATCH_SIZE]
+            results = _run_inference([tile for tile, _ in batch], conf=0.3)
+            tile_rows += [_map_boxes(_result_rows(result), offset) for (_, offset), result in zip(batch, results)]
+        
+        # Whole-image boxes come first and take precedence (they are what a
+        # single downscaled pass would return); tile boxes that duplicate or
+        # are pieces of them are dropped, and the rest are merged with NMS
+        tile_boxes, tile_confidences = _merge_detections(
+            _drop_fragments(np.concatenate(tile_rows), overview_rows))
+        
+        boxes = np.concatenate([overview_rows[:, :4], tile_boxes])
+        confidences = np.concatenate([overview_rows[:, 4], tile_confidences])
+        
+        return _crop_best_box(image, boxes, confidences)
+    
+    except Exception as e:
+        print(f"Error in tiled YOLO detection: {str(e)}")
+        return None, None
+
+
+def detect_plate_regions_batch(images):
+    """
+    Detect license plate regions in several images with one YOLO call.
+    
+    Ultralytics batches a list input into a single forward pass, which is
+    much cheaper per image than calling detect_plate_region() in a loop.
+    
+    Args:
+        images: List of input images (BGR format from OpenCV, or PIL Images)
+    
+    Returns:
+        list: One (plate_region, bounding_box) tuple per input image, in order.
+              Entries are (None, None) where no plate was detected.
+    """
+    if not images:
+        return []
+    
+    try:
+        from . import utils
         
-        if len(boxes) == 0:
-            return None, None
+        # Ensure images are in OpenCV BGR format
+        images = [utils.ensure_opencv_format(image) for image in images]
+        valid_indices = [i for i, image in enumerate(images) if image is not None]
         
-        # Filter by confidence and take the detection with highest confidence
-        best_detection = None
-        best_score = 0
+        detections = [(None, None)] * len(images)
+        if not valid_indices:
+            return detections
         
-        for i, (box, conf) in enumerate(zip(boxes, confidences)):
-            x1, y1, x2, y2 = box
-            w = x2 - x1
-            h = y2 - y1
-            
-            # Basic plate-like shape filtering
-            aspect_ratio = w / h if h > 0 else 0
-            
-            # License plates are typically between 1.5-8 times wider than tall
-            if 1.5 < aspect_ratio < 8.0:
-                score = conf * (1 + abs(aspect_ratio - 3.5) / 10)
-                if score > best_score:
-                    best_score = score
-                    best_detection = (x1, y1, x2, y2)
-        
-        # If no detection with good aspect ratio, just take the highest confidence one
-        if best_detection is None:
-            x1, y1, x2, y2 = boxes[0]
-            best_detection = (x1, y1, x2, y2)
-        
-        x1, y1, x2, y2 = best_detection
-        x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
-        
-        # Ensure coordinates are within bounds
-        x1 = max(0, x1)
-        y1 = max(0, y1)
-        x2 = min(image.shape[1], x2)
-        y2 = min(image.shape[0], y2)
-        
-        w = x2 - x1
-        h = y2 - y1
-        
-        # Add small padding
-        padding = 5
-        x1 = max(0, x1 - padding)
-        y1 = max(0, y1 - padding)
-        x2 = min(image.shape[1], x2 + padding)
-        y2 = min(image.shape[0], y2 + padding)
+        # Run batched inference with confidence threshold
+        results = _run_inference([images[i] for i in valid_indices], conf=0.3)
         
-        # Extract plate region
-        plate_region = image[y1:y2, x1:x2]
+        # Demultiplex per-image results
+        for i, result in zip(valid_indices, results):
+            detections[i] = _extract_best_plate(images[i], result)
         
-        # Return region and bounding box in (x, y, w, h) format
-        return plate_region, (x1, y1, x2 - x1, y2 - y1)
+        return detections
     
     except Exception as e:
-        print(f"Error in YOLO detection: {str(e)}")
-        return None, None
+        print(f"Error in batched YOLO detection: {str(e)}")
+        return [(None, None)] * len(images)
 
 
 def detect_plate_region_with_debug(image, debug=True):
@@ -165,7 +608,8 @@ def detect_plate_region_with_debug(image, debug=True):
         tuple: (plate_region, bounding_box, debug_image) where:
             - plate_region: cropped image containing the plate
             - bounding_box: (x, y, w, h) coordinates
-            - debug_image: image with all detections drawn
+            - debug_image: copy of the image with all detections drawn
+              (the input image itself, undrawn, when debug is False)
             Returns (None, None, None) if no plate detected
     """
     try:
@@ -177,12 +621,11 @@ def detect_plate_region_with_debug(image, debug=True):
             print("Error: Could not convert image to OpenCV format")
             return None, None, None
         
-        model = get_yolo_model()
-        
         # Run inference with confidence threshold
-        results = model(image, conf=0.3, verbose=False)
+        results = _run_inference(image, conf=0.3)
         
-        debug_image = image.copy()
+        # Only pay for a copy when we are going to draw on it
+        debug_image = image.copy() if debug else image
         
         if not results or len(results) == 0:
             if debug:
@@ -197,10 +640,11 @@ def detect_plate_region_with_debug(image, debug=True):
                 print("[DEBUG] No boxes detected")
             return None, None, debug_image
         
-        # Get bounding boxes
-        boxes = detections.boxes.xyxy.cpu().numpy()
-        confidences = detections.boxes.conf.cpu().numpy()
-        class_ids = detections.boxes.cls.cpu().numpy() if detections.boxes.cls is not None else [0] * len(boxes)
+        # Single device-to-host copy of [x1, y1, x2, y2, conf, cls] rows
+        data = detections.boxes.data.cpu().numpy()
+        boxes = data[:, :4]
+        confidences = data[:, 4]
+        class_ids = data[:, 5] if data.shape[1] > 5 else np.zeros(len(boxes))
         
         if debug:
             print(f"[DEBUG] Total detections: {len(boxes)}")
@@ -211,75 +655,41 @@ def detect_plate_region_with_debug(image, debug=True):
             return None, None, debug_image
         
         # Draw all detections on debug image
-        for i, (box, conf, class_id) in enumerate(zip(boxes, confidences, class_ids)):
-            x1, y1, x2, y2 = box
-            x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
-            
-            # Draw bounding box
-            cv2.rectangle(debug_image, (x1, y1), (x2, y2), (0, 255, 255), 2)
-            
-            # Draw confidence and class
-            label = f"Class {int(class_id)}: {conf:.2f}"
-            cv2.putText(debug_image, label, (x1, y1 - 10),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
-            
-            if debug:
+        if debug:
+            for i, (box, conf, class_id) in enumerate(zip(boxes, confidences, class_ids)):
+                x1, y1, x2, y2 = box
+                x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
+                
+                # Draw bounding box
+                cv2.rectangle(debug_image, (x1, y1), (x2, y2), (0, 255, 255), 2)
+                
+                # Draw confidence and class
+                label = f"Class {int(class_id)}: {conf:.2f}"
+                cv2.putText(debug_image, label, (x1, y1 - 10),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
+                
                 print(f"  Detection {i+1}: Class={int(class_id)}, Conf={conf:.3f}, "
                       f"Box=[{x1},{y1},{x2},{y2}]")
         
-        # Filter by confidence and take the detection with highest confidence
-        best_detection = None
-        best_score = 0
-        
-        for i, (box, conf) in enumerate(zip(boxes, confidences)):
-            x1, y1, x2, y2 = box
-            w = x2 - x1
-            h = y2 - y1
-            
-            # Basic plate-like shape filtering
-            aspect_ratio = w / h if h > 0 else 0
-            
-            # License plates are typically between 1.5-8 times wider than tall
-            if 1.5 < aspect_ratio < 8.0:
-                score = conf * (1 + abs(aspect_ratio - 3.5) / 10)
-                if score > best_score:
-                    best_score = score
-                    best_detection = (x1, y1, x2, y2)
-        
-        # If no detection with good aspect ratio, just take the highest confidence one
-        if best_detection is None:
-            x1, y1, x2, y2 = boxes[0]
-            best_detection = (x1, y1, x2, y2)
+        # Take the most plate-like detection (first box if none look like a plate)
+        best_index, best_score = _select_best_box(boxes, confidences)
         
         if debug:
             print(f"[DEBUG] Selected detection with score: {best_score:.3f}")
         
-        x1, y1, x2, y2 = best_detection
-        x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
-        
-        # Ensure coordinates are within bounds
-        x1 = max(0, x1)
-        y1 = max(0, y1)
-        x2 = min(image.shape[1], x2)
-        y2 = min(image.shape[0], y2)
-        
-        w = x2 - x1
-        h = y2 - y1
-        
-        # Add small padding
-        padding = 5
-        x1_padded = max(0, x1 - padding)
-        y1_padded = max(0, y1 - padding)
-        x2_padded = min(image.shape[1], x2 + padding)
-        y2_padded = min(image.shape[0], y2 + padding)
+        # Clip to the image and add small padding
+        x1_padded, y1_padded, x2_padded, y2_padded = _clip_and_pad_boxes(
+            boxes[best_index:best_index + 1], image.shape
+        )[0].tolist()
         
         # Extract plate region
         plate_region = image[y1_padded:y2_padded, x1_padded:x2_padded]
         
         # Draw selected detection in green
-        cv2.rectangle(debug_image, (x1_padded, y1_padded), (x2_padded, y2_padded), (0, 255, 0), 3)
-        cv2.putText(debug_image, "SELECTED", (x1_padded, y1_padded - 20),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        if debug:
+            cv2.rectangle(debug_image, (x1_padded, y1_padded), (x2_padded, y2_padded), (0, 255, 0), 3)
+            cv2.putText(debug_image, "SELECTED", (x1_padded, y1_padded - 20),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
         
         # Return region, bounding box in (x, y, w, h) format, and debug image
         return plate_region, (x1_padded, y1_padded, x2_padded - x1_padded, y2_padded - y1_padded), debug_image
@@ -289,7 +699,7 @@ def detect_plate_region_with_debug(image, debug=True):
         return None, None, image.copy()
 
 
-def draw_bounding_box(image, bounding_box, color=(0, 255, 0), thickness=2):
+def draw_bounding_box(image, bounding_box, color=(0, 255, 0), thickness=2, inplace=False):
     """
     Draw bounding box on an image.
     
@@ -298,6 +708,7 @@ def draw_bounding_box(image, bounding_box, color=(0, 255, 0), thickness=2):
         bounding_box: (x, y, w, h) coordinates
         color: BGR color tuple
         thickness: Line thickness
+        inplace: If True, draw directly on ``image`` instead of a copy
     
     Returns:
         Image with drawn bounding box
@@ -305,7 +716,7 @@ def draw_bounding_box(image, bounding_box, color=(0, 255, 0), thickness=2):
     if bounding_box is None:
         return image
     
-    image_copy = image.copy()
+    image_copy = image if inplace else image.copy()
     x, y, w, h = bounding_box
     
     # Draw rectangle
@@ -334,10 +745,8 @@ def get_all_plate_regions(image, max_plates=5):
             print("Error: Could not convert image to OpenCV format")
             return []
         
-        model = get_yolo_model()
-        
         # Run inference
-        results = model(image, conf=0.25, verbose=False)
+        results = _run_inference(image, conf=0.25)
         
         if not results or len(results) == 0:
             return []
@@ -347,29 +756,17 @@ def get_all_plate_regions(image, max_plates=5):
         if detections.boxes is None or len(detections.boxes) == 0:
             return []
         
-        # Get bounding boxes and confidences
-        boxes = detections.boxes.xyxy.cpu().numpy()
-        confidences = detections.boxes.conf.cpu().numpy()
+        # Single device-to-host copy of [x1, y1, x2, y2, conf, cls] rows
+        data = detections.boxes.data.cpu().numpy()
+        boxes = data[:, :4]
+        confidences = data[:, 4]
+        
+        # Clip all boxes to the image and add padding in one pass
+        padded_boxes = _clip_and_pad_boxes(boxes, image.shape).tolist()
         
         plate_list = []
         
-        for box, conf in zip(boxes, confidences):
-            x1, y1, x2, y2 = box
-            x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
-            
-            # Ensure coordinates are within bounds
-            x1 = max(0, x1)
-            y1 = max(0, y1)
-            x2 = min(image.shape[1], x2)
-            y2 = min(image.shape[0], y2)
-            
-            # Add padding
-            padding = 5
-            x1_padded = max(0, x1 - padding)
-            y1_padded = max(0, y1 - padding)
-            x2_padded = min(image.shape[1], x2 + padding)
-            y2_padded = min(image.shape[0], y2 + padding)
-            
+        for (x1_padded, y1_padded, x2_padded, y2_padded), conf in zip(padded_boxes, confidences):
             # Extract plate region
             plate_region = image[y1_padded:y2_padded, x1_padded:x2_padded]
             
@@ -1,6 +1,19 @@
 
 import cv2
+import itertools
+import numpy as np
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+
+# Threads per native thread pool (OpenCV, and OpenMP for Torch/EasyOCR).
+# Each library otherwise sizes its pool to every core, and nested pools
+# (OCR worker threads each running multi-threaded kernels) oversubscribe
+# the CPU. OMP_NUM_THREADS must be set before Torch is first imported.
+_N_THREADS = int(os.environ.get('ALPR_CV_THREADS', min(4, os.cpu_count() or 1)))
+os.environ.setdefault('OMP_NUM_THREADS', str(_N_THREADS))
+cv2.setNumThreads(_N_THREADS)
+
 from . import detector
 from . import ocr
 from . import plate_color
@@ -9,6 +22,39 @@ from . import plate_validation
 from . import utils
 
 
+# Annotation style for processed images (BGR colors)
+_FONT = cv2.FONT_HERSHEY_SIMPLEX
+_PLATE_COLOR = (0, 255, 0)
+_OWNER_COLOR = (255, 255, 255)
+
+# Photos larger than this (longest side) are downscaled before detection.
+# Tiled detection keeps small plates readable at this size, and a 4K photo
+# then needs about half as many tiles
+_MAX_IMAGE_SIDE = 2560
+
+# Worker threads used to OCR plate crops from a video batch in parallel.
+# Each OCR call can itself run _N_THREADS threads (a Tesseract subprocess
+# inherits OMP_NUM_THREADS, EasyOCR uses Torch's OpenMP pool), so the pool
+# is sized to keep workers * _N_THREADS within the core count
+_OCR_WORKERS = max(1, (os.cpu_count() or 1) // _N_THREADS)
+
+# A plate detected in consecutive processed video frames with boxes that
+# overlap by at least this IoU is treated as the same plate and OCR'd once
+_PLATE_TRACK_IOU = 0.3
+
+# Sampled video frames are compared on a downscaled grayscale thumbnail;
+# a frame is kept when enough thumbnail pixels changed by more than
+# _MOTION_PIXEL_DELTA since the last kept frame. 0.2% of a 160x120
+# thumbnail is about a 40x24 pixel area of an 800x600 frame
+_MOTION_THUMB_SIZE = (160, 120)
+_MOTION_PIXEL_DELTA = 20
+_MOTION_MIN_FRACTION = 0.002
+
+# Largest crops kept per plate cluster; the next one is tried when OCR of
+# the largest does not give a valid plate
+_MAX_CLUSTER_CANDIDATES = 3
+
+
 def run_alpr(image_or_video_path):
     """
     Main ALPR function - runs the complete license plate recognition pipeline.
@@ -22,7 +68,8 @@ def run_alpr(image_or_video_path):
     6. Returns comprehensive results
     
     Args:
-        image_or_video_path: Path to image (.jpg, .png) or video (.mp4, .avi) file
+        image_or_video_path: Path to image (.jpg, .png) or video (.mp4, .avi) file,
+            or an already decoded BGR image (np.ndarray)
     
     Returns:
         dict: Detection results with keys:
@@ -31,11 +78,17 @@ def run_alpr(image_or_video_path):
             - results: list (list of detected plates if successful)
             - timestamp: str
             - processed_image: np.ndarray (image with bounding boxes)
+            - error: bool (only present, True, if processing raised an
+              exception; such a failure may succeed on a retry)
     """
     
-    # Determine file type
-    is_video = utils.is_video_file(image_or_video_path)
-    is_image = utils.is_image_file(image_or_video_path)
+    # Determine file type. Decoded images (e.g. Streamlit uploads) are
+    # processed directly, skipping the disk round trip
+    if isinstance(image_or_video_path, np.ndarray):
+        is_video, is_image = False, True
+    else:
+        is_video = utils.is_video_file(image_or_video_path)
+        is_image = utils.is_image_file(image_or_video_path)
     
     if not is_image and not is_video:
         return {
@@ -58,22 +111,26 @@ def run_alpr(image_or_video_path):
             'message': f'Error processing file: {str(e)}',
             'results': [],
             'timestamp': utils.get_timestamp(),
-            'processed_image': None
+            'processed_image': None,
+            'error': True
         }
 
 
-def _process_image(image_path):
+def _process_image(image_or_path):
     """
     Process a single image for ALPR.
     
     Args:
-        image_path: Path to image file
+        image_or_path: Path to image file, or a decoded BGR image
     
     Returns:
         dict: Detection results
     """
     # Load image
-    image = utils.load_image(image_path)
+    if isinstance(image_or_path, np.ndarray):
+        image = image_or_path
+    else:
+        image = utils.load_image(image_or_path)
     if image is None:
         return {
             'success': False,
@@ -83,11 +140,25 @@ def _process_image(image_path):
             'processed_image': None
         }
     
+    # Cap very large photos (e.g. 4K phone shots) before any detection work
+    image = utils.resize_image(image, max_width=_MAX_IMAGE_SIDE, max_height=_MAX_IMAGE_SIDE)
+    
     # Resize for processing if too large
     display_image = utils.resize_image(image, max_width=800, max_height=600)
     
+    # Boxes are drawn in place below, so never draw on the caller's array
+    if display_image is image_or_path:
+        display_image = display_image.copy()
+    
     # Detect license plate region - also get bounding box for drawing
-    plate_region, bounding_box = detector.detect_plate_region(display_image)
+    if max(image.shape[:2]) >= detector.TILE_MIN_SIDE:
+        # Large photo: detect on the whole image and on full-resolution tiles
+        # so small plates survive, then map the box onto the display image
+        plate_region, full_box = detector.detect_plate_region_tiled(image)
+        scale = display_image.shape[1] / image.shape[1]
+        bounding_box = tuple(int(round(v * scale)) for v in full_box) if full_box else None
+    else:
+        plate_region, bounding_box = detector.detect_plate_region(display_image)
     
     if plate_region is None:
         return {
@@ -98,8 +169,10 @@ def _process_image(image_path):
             'processed_image': display_image
         }
     
-    # Extract text from plate
-    raw_text = ocr.extract_text_from_plate(plate_region)
+    # Extract text from plate (skip OCR on blurry/flat crops that cannot hold text).
+    # Convert to grayscale once for both the texture check and OCR
+    plate_gray = cv2.cvtColor(plate_region, cv2.COLOR_BGR2GRAY)
+    raw_text = ocr.extract_text_from_plate(plate_region, gray=plate_gray) if ocr.has_text_texture(plate_gray) else ''
     
     # Validate and format using Nigerian plate format (AAA-123AA)
     is_valid, formatted_text = plate_validation.validate_and_format_plate(raw_text)
@@ -110,7 +183,7 @@ def _process_image(image_path):
             'message': f"Invalid Nigerian license plate format",
             'results': [],
             'timestamp': utils.get_timestamp(),
-            'processed_image': detector.draw_bounding_box(display_image, bounding_box)
+            'processed_image': detector.draw_bounding_box(display_image, bounding_box, inplace=True)
         }
     
     # Look up vehicle in database
@@ -134,15 +207,16 @@ def _process_image(image_path):
         result['plate_color'] = vehicle_info.get('plate_color', 'Unknown')
         result['plate_type'] = vehicle_info.get('plate_type', 'Unknown')
     
-    # Draw bounding box on image
-    processed_image = detector.draw_bounding_box(display_image, bounding_box, color=(0, 255, 0), thickness=2)
+    # Draw bounding box directly on the resized image (we own it)
+    processed_image = detector.draw_bounding_box(display_image, bounding_box, color=_PLATE_COLOR, thickness=2,
+                                                 inplace=True)
     
     # Add text annotations
     cv2.putText(processed_image, f"Plate: {formatted_text}", (10, 30),
-                cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
+                _FONT, 0.9, _PLATE_COLOR, 2)
     if result['registered']:
         cv2.putText(processed_image, f"Owner: {result['owner_name']}", (10, 60),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 1)
+                    _FONT, 0.7, _OWNER_COLOR, 1)
     
     return {
         'success': True,
@@ -153,16 +227,25 @@ def _process_image(image_path):
     }
 
 
-def _process_video(video_path):
+def _process_video(video_path, batch_size=None):
     """
     Process a video for ALPR by extracting frames.
     
+    Frames are sent to the detector in chunks of ``batch_size`` so that
+    YOLO runs one forward pass per chunk instead of one per frame. OCR and
+    database lookups are deferred until all frames are scanned and run once
+    per plate track (the same plate followed across consecutive frames).
+    
     Args:
         video_path: Path to video file
+        batch_size: Frames per YOLO forward pass (defaults to detector.DEFAULT_BATCH_SIZE)
     
     Returns:
         dict: Detection results from all frames
     """
+    if batch_size is None:
+        batch_size = detector.DEFAULT_BATCH_SIZE
+    
     # Get video info
     video_info = utils.get_video_info(video_path)
     if not video_info:
@@ -174,43 +257,59 @@ def _process_video(video_path):
             'processed_image': None
         }
     
-    # Extract frames (one frame per second)
-    frames = utils.extract_frames_from_video(video_path, frame_interval=int(video_info['fps']))
+    # Sample one frame per second, decoded ahead in a background thread.
+    # Keyframe sampling is not used here: its spacing follows the encoder's
+    # keyframe interval, which can leave a passing car unsampled
+    frames = utils.iter_video_frames(video_path, frame_interval=int(video_info['fps']))
     
-    if not frames:
-        return {
-            'success': False,
-            'message': 'Failed to extract frames from video.',
-            'results': [],
-            'timestamp': utils.get_timestamp(),
-            'processed_image': None
-        }
+    # Skip frames that look the same as the last one we ran detection on
+    distinct_frames = _iter_distinct_frames(frames)
     
-    # Process each frame
-    all_results = []
-    processed_frames = []
+    # Process frames in batches as they are decoded. Only detection runs per
+    # frame; plate crops are grouped into tracks by box overlap and
+    # OCR/lookup run once per track after the whole video has been scanned
+    clusters = []
+    frames_processed = 0
     
-    for frame_idx, frame in enumerate(frames):
-        # Resize frame for processing
-        display_frame = utils.resize_image(frame, max_width=800, max_height=600)
+    while True:
+        batch = list(itertools.islice(distinct_frames, batch_size))
+        if not batch:
+            break
         
-        # Detect plate
-        plate_region, bounding_box = detector.detect_plate_region(display_frame)
+        frame_indices = [frame_idx for frame_idx, _ in batch]
         
-        if plate_region is None:
-            continue
+        # Resize frames for processing
+        display_frames = detector.preprocess_frames([frame for _, frame in batch], max_width=800, max_height=600)
         
-        # Extract text
-        raw_text = ocr.extract_text_from_plate(plate_region)
+        # Detect plates for the whole batch in one forward pass
+        detections = detector.detect_plate_regions_batch(display_frames)
         
-        # Validate and format using Nigerian plate format
-        is_valid, formatted_text = plate_validation.validate_and_format_plate(raw_text)
+        for offset, (frame_idx, display_frame, (plate_region, bounding_box)) in enumerate(
+                zip(frame_indices, display_frames, detections)):
+            if plate_region is not None:
+                _add_to_plate_cluster(clusters, (frame_idx, display_frame, plate_region, bounding_box),
+                                      frames_processed + offset)
         
-        if not is_valid:
+        frames_processed += len(batch)
+    
+    # OCR releases the GIL (Tesseract subprocess, EasyOCR/OpenCV native code),
+    # so per-plate OCR work runs concurrently; reads keep cluster order so
+    # the plate seen first in the video still wins below
+    with ThreadPoolExecutor(max_workers=_OCR_WORKERS) as executor:
+        cluster_reads = _read_cluster_texts(clusters, executor)
+    
+    all_results = []
+    seen_plates = set()
+    processed_image = None
+    
+    for cluster, formatted_text in zip(clusters, cluster_reads):
+        if formatted_text is None:
             continue
         
+        frame_idx, display_frame, bounding_box = cluster['frame']
+        
         # Skip if we already have this plate
-        if any(r['plate_number'] == formatted_text for r in all_results):
+        if formatted_text in seen_plates:
             continue
         
         # Look up vehicle
@@ -236,15 +335,27 @@ def _process_video(video_path):
             result['plate_type'] = vehicle_info.get('plate_type', 'Unknown')
         
         all_results.append(result)
+        seen_plates.add(formatted_text)
         
-        # Draw on frame
-        processed_frame = detector.draw_bounding_box(display_frame, bounding_box, color=(0, 255, 0), thickness=2)
-        cv2.putText(processed_frame, f"Plate: {formatted_text}", (10, 30),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
-        if result['registered']:
-            cv2.putText(processed_frame, f"Owner: {result['owner_name']}", (10, 60),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
-        processed_frames.append(processed_frame)
+        # Only the first plate's frame is returned, so only that one is annotated.
+        # Draw directly on the cluster's copy of the frame (we own it)
+        if processed_image is None:
+            processed_image = detector.draw_bounding_box(display_frame, bounding_box, color=_PLATE_COLOR,
+                                                         thickness=2, inplace=True)
+            cv2.putText(processed_image, f"Plate: {formatted_text}", (10, 30),
+                        _FONT, 0.8, _PLATE_COLOR, 2)
+            if result['registered']:
+                cv2.putText(processed_image, f"Owner: {result['owner_name']}", (10, 60),
+                            _FONT, 0.6, _OWNER_COLOR, 1)
+    
+    if frames_processed == 0:
+        return {
+            'success': False,
+            'message': 'Failed to extract frames from video.',
+            'results': [],
+            'timestamp': utils.get_timestamp(),
+            'processed_image': None
+        }
     
     if not all_results:
         return {
@@ -255,16 +366,160 @@ def _process_video(video_path):
             'processed_image': None
         }
     
-    # Return first processed frame and all results
+    # Return first annotated frame and all results
     return {
         'success': True,
         'message': f'Successfully detected {len(all_results)} unique plate(s) in video',
         'results': all_results,
         'timestamp': utils.get_timestamp(),
-        'processed_image': processed_frames[0] if processed_frames else frames[0]
+        'processed_image': processed_image
     }
 
 
+def _box_iou(box_a, box_b):
+    """
+    Intersection over union of two (x, y, w, h) boxes.
+    
+    Args:
+        box_a: First box
+        box_b: Second box
+    
+    Returns:
+        float: IoU in [0, 1]
+    """
+    inter_w = min(box_a[0] + box_a[2], box_b[0] + box_b[2]) - max(box_a[0], box_b[0])
+    inter_h = min(box_a[1] + box_a[3], box_b[1] + box_b[3]) - max(box_a[1], box_b[1])
+    if inter_w <= 0 or inter_h <= 0:
+        return 0.0
+    
+    inter = inter_w * inter_h
+    return inter / (box_a[2] * box_a[3] + box_b[2] * box_b[3] - inter)
+
+
+def _add_to_plate_cluster(clusters, candidate, frame_seq, min_iou=_PLATE_TRACK_IOU):
+    """
+    Group a detected plate with the same plate in the previous processed frame.
+    
+    The same plate is usually detected in several consecutive frames;
+    following its box from frame to frame lets OCR run once per plate
+    instead of once per frame. A detection joins the cluster whose box it
+    overlaps in the immediately preceding processed frame, otherwise it
+    starts a new one, so different vehicles are never merged just because
+    their plates look alike. Each cluster keeps only its largest crops,
+    which read best.
+    
+    Crops are stored as copies, and each cluster keeps a copy of just one
+    frame (the one with its largest crop, for the annotated result), so
+    decoded frames are freed as the video is scanned.
+    
+    Args:
+        clusters: List of clusters (dicts with 'box', 'frame_seq', 'frame' and
+            'candidates'), updated in place
+        candidate: Tuple (frame_idx, display_frame, plate_region, bounding_box)
+        frame_seq: Position of the candidate's frame among the processed frames
+        min_iou: Smallest box IoU with the previous frame's detection that continues a cluster
+    """
+    frame_idx, display_frame, plate_region, bounding_box = candidate
+    
+    for cluster in clusters:
+        if cluster['frame_seq'] == frame_seq - 1 and _box_iou(bounding_box, cluster['box']) >= min_iou:
+            break
+    else:
+        cluster = {'candidates': []}
+        clusters.append(cluster)
+    
+    cluster['box'] = bounding_box
+    cluster['frame_seq'] = frame_seq
+    
+    # plate_region is a view into the frame; copy it so the frame is not kept alive
+    entry = (frame_idx, plate_region.copy(), bounding_box)
+    
+    # Largest crop first; stable sort keeps earlier frames ahead on ties
+    cluster['candidates'].append(entry)
+    cluster['candidates'].sort(key=lambda c: c[1].shape[0] * c[1].shape[1], reverse=True)
+    del cluster['candidates'][_MAX_CLUSTER_CANDIDATES:]
+    
+    if cluster['candidates'][0] is entry:
+        cluster['frame'] = (frame_idx, display_frame.copy(), bounding_box)
+
+
+def _read_cluster_texts(clusters, executor):
+    """
+    OCR plate clusters, trying each cluster's crops from largest to smallest.
+    
+    Each round reads one crop from every cluster still without a valid plate
+    in a single batched OCR call, so EasyOCR sees all plates at once.
+    
+    Args:
+        clusters: Clusters as built by _add_to_plate_cluster()
+        executor: Executor used for the per-plate OCR stages
+    
+    Returns:
+        list: Per cluster, the formatted text of the first crop that reads
+              as a valid plate, or None if none of them do
+    """
+    reads = [None] * len(clusters)
+    
+    for rank in range(_MAX_CLUSTER_CANDIDATES):
+        # Convert each crop to grayscale once for the texture check and OCR,
+        # and skip OCR on blurry/flat crops that cannot hold text
+        pending = []
+        for i, cluster in enumerate(clusters):
+            if reads[i] is None and rank < len(cluster['candidates']):
+                candidate = cluster['candidates'][rank]
+                plate_gray = cv2.cvtColor(candidate[1], cv2.COLOR_BGR2GRAY)
+                if ocr.has_text_texture(plate_gray):
+                    pending.append((i, candidate, plate_gray))
+        if not pending:
+            continue
+        
+        raw_texts = ocr.extract_text_from_plates([candidate[1] for _, candidate, _ in pending],
+                                                 grays=[plate_gray for _, _, plate_gray in pending],
+                                                 executor=executor)
+        
+        for (i, _, _), raw_text in zip(pending, raw_texts):
+            # Validate and format using Nigerian plate format
+            is_valid, formatted_text = plate_validation.validate_and_format_plate(raw_text)
+            if is_valid:
+                reads[i] = formatted_text
+    
+    return reads
+
+
+def _iter_distinct_frames(frames, min_changed_fraction=_MOTION_MIN_FRACTION):
+    """
+    Drop frames that are near-duplicates of the last frame kept.
+    
+    Stationary scenes produce many sampled frames that look the same; they
+    cannot yield a new plate, so YOLO and OCR are skipped for them. Each
+    frame is shrunk to a small grayscale thumbnail and compared pixel by
+    pixel with the last kept one, so a vehicle entering a small part of an
+    otherwise static scene still counts as a change.
+    
+    Args:
+        frames: Iterable of frames (BGR format)
+        min_changed_fraction: Frames where fewer than this fraction of
+            thumbnail pixels changed since the last kept frame are skipped
+    
+    Yields:
+        tuple: (frame_idx, frame) for each kept frame, where frame_idx is the
+               frame's position in ``frames``
+    """
+    last_thumb = None
+    
+    for frame_idx, frame in enumerate(frames):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        thumb = cv2.resize(gray, _MOTION_THUMB_SIZE, interpolation=cv2.INTER_AREA)
+        
+        if last_thumb is not None:
+            changed = np.count_nonzero(cv2.absdiff(thumb, last_thumb) > _MOTION_PIXEL_DELTA)
+            if changed < min_changed_fraction * thumb.size:
+                continue
+        
+        last_thumb = thumb
+        yield frame_idx, frame
+
+
 def get_result_summary(result):
     """
     Create a human-readable summary of detection results.
@@ -278,19 +533,23 @@ def get_result_summary(result):
     if not result['success']:
         return f"❌ {result['message']}"
     
-    summary = f"✅ Detection Successful\n\n"
-    summary += f"Timestamp: {result['timestamp']}\n"
-    summary += f"Plates Found: {len(result['results'])}\n\n"
+    parts = [
+        "✅ Detection Successful\n\n",
+        f"Timestamp: {result['timestamp']}\n",
+        f"Plates Found: {len(result['results'])}\n\n",
+    ]
     
     for i, plate_result in enumerate(result['results'], 1):
-        summary += f"--- Plate {i} ---\n"
-        summary += f"Plate Number: {plate_result['plate_number']}\n"
-        summary += f"Plate Type: {plate_result['plate_type']}\n"
-        summary += f"Plate Color: {plate_result['plate_color']}\n"
-        summary += f"Owner: {plate_result['owner_name']}\n"
-        summary += f"State: {plate_result['state']}\n"
-        summary += f"Registered: {'Yes' if plate_result['registered'] else 'No'}\n"
-        summary += f"Vehicle: {plate_result['vehicle_type']}\n"
-        summary += f"Year: {plate_result.get('year', 'N/A')}\n\n"
-    
-    return summary
+        parts.append(
+            f"--- Plate {i} ---\n"
+            f"Plate Number: {plate_result['plate_number']}\n"
+            f"Plate Type: {plate_result['plate_type']}\n"
+            f"Plate Color: {plate_result['plate_color']}\n"
+            f"Owner: {plate_result['owner_name']}\n"
+            f"State: {plate_result['state']}\n"
+            f"Registered: {'Yes' if plate_result['registered'] else 'No'}\n"
+            f"Vehicle: {plate_result['vehicle_type']}\n"
+            f"Year: {plate_result.get('year', 'N/A')}\n\n"
+        )
+    
+    return ''.join(parts)
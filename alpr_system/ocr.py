@@ -2,6 +2,8 @@
 import cv2
 import numpy as np
 import re
+import threading
+import torch
 
 # Try to import pytesseract; if not available, use fallback
 try:
@@ -22,19 +24,86 @@ except ImportError:
 
 # Global EasyOCR reader cache
 _ocr_reader = None
+_ocr_reader_lock = threading.Lock()
+
+# 3x3 sharpening kernel (image + 9 * (image - 3x3 mean)). OpenCV's SIMD
+# filter2D beats a separable box blur + addWeighted at this kernel size
+_SHARPEN_KERNEL = np.array([[-1, -1, -1],
+                            [-1,  9, -1],
+                            [-1, -1, -1]], dtype=np.float32)
+
+# Characters removed from OCR output (anything but A-Z and 0-9)
+_NON_PLATE_CHARS_RE = re.compile(r'[^A-Z0-9]')
+
+# Morphology kernel used to close gaps in characters in the contour fallback
+_MORPH_KERNEL = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
+
+# Per-thread CLAHE instances; a CLAHE object keeps internal buffers, so one
+# instance cannot be shared by OCR worker threads
+_clahe_local = threading.local()
+
+# Plate crops with less Laplacian variance than this are too blurry or
+# uniform to contain readable characters, so OCR is skipped for them
+MIN_TEXTURE_VARIANCE = 80.0
+
+# Plate crops narrower than this (in pixels) are too small for OCR to read
+MIN_PLATE_WIDTH = 60
 
 
 def get_ocr_reader():
-    """Initialize and cache the EasyOCR reader (fallback method)."""
+    """
+    Initialize and cache the EasyOCR reader (fallback method).
+    
+    The reader is warmed up in a background thread at import; callers that
+    arrive while it is still loading wait for that load instead of starting
+    a second one.
+    """
     global _ocr_reader
     if _ocr_reader is None and EASYOCR_AVAILABLE:
-        try:
-            _ocr_reader = easyocr.Reader(['en'], gpu=False)
-        except Exception as e:
-            print(f"Warning: Could not initialize EasyOCR: {str(e)}")
+        with _ocr_reader_lock:
+            if _ocr_reader is None:
+                try:
+                    # GPU when CUDA is available; on CPU, quantize=True runs the
+                    # models with int8 dynamic quantization
+                    _ocr_reader = easyocr.Reader(['en'], gpu=torch.cuda.is_available(), quantize=True)
+                except Exception as e:
+                    print(f"Warning: Could not initialize EasyOCR: {str(e)}")
     return _ocr_reader
 
 
+def _get_clahe():
+    """Return this thread's cached CLAHE instance, creating it on first use."""
+    clahe = getattr(_clahe_local, 'clahe', None)
+    if clahe is None:
+        clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
+        _clahe_local.clahe = clahe
+    return clahe
+
+
+def has_text_texture(plate_image, min_variance=MIN_TEXTURE_VARIANCE, min_width=MIN_PLATE_WIDTH):
+    """
+    Cheap check that a plate crop has enough edge detail to hold text.
+    
+    Uses the variance of the Laplacian: blurry or flat crops (false
+    detections on bumpers, wheel arches, etc.) score low. Crops narrower
+    than ``min_width`` are rejected outright. This costs microseconds, far
+    less than a Tesseract/EasyOCR call.
+    
+    Args:
+        plate_image: Image containing only the license plate
+        min_variance: Minimum Laplacian variance to accept
+        min_width: Minimum crop width in pixels to accept
+    
+    Returns:
+        bool: True if OCR is worth running on the crop
+    """
+    if plate_image is None or plate_image.size == 0 or plate_image.shape[1] < min_width:
+        return False
+    
+    gray = cv2.cvtColor(plate_image, cv2.COLOR_BGR2GRAY) if len(plate_image.shape) == 3 else plate_image
+    return cv2.Laplacian(gray, cv2.CV_64F).var() >= min_variance
+
+
 def cleanup_ocr_text(text):
     """
     Clean up OCR-extracted text for Nigerian license plates.
@@ -49,42 +118,43 @@ def cleanup_ocr_text(text):
     Returns:
         Cleaned text (uppercase alphanumeric only)
     """
-    text = text.upper().strip()
-    # Remove all non-alphanumeric characters (except hyphen for now)
-    text = re.sub(r'[^A-Z0-9]', '', text)
-    return text
+    # Uppercase, then drop everything that is not A-Z/0-9 (also strips whitespace)
+    return _NON_PLATE_CHARS_RE.sub('', text.upper())
 
 
-def enhance_plate_image(image):
+def enhance_plate_image(image, gray=None):
     """
     Enhanced preprocessing pipeline for Nigerian license plates.
     
     Pipeline:
     1. Convert to grayscale
     2. Apply bilateral filter (noise reduction)
-    3. Apply adaptive thresholding
-    4. Increase contrast
+    3. Increase contrast
+    4. Apply adaptive thresholding
     5. Resize for better OCR (at least 2x)
+    6. Sharpen
     
     Args:
         image: Input plate image
+        gray: Optional grayscale version of ``image``, if the caller already has one
     
     Returns:
         Enhanced image suitable for OCR
     """
     # Convert to grayscale if color image
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
+    if gray is None:
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
     
     # Step 1: Bilateral filter (reduce noise while preserving edges)
     filtered = cv2.bilateralFilter(gray, 9, 75, 75)
     
-    # Step 2: Adaptive thresholding
-    adaptive_thresh = cv2.adaptiveThreshold(filtered, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                                            cv2.THRESH_BINARY, 11, 2)
+    # Step 2: Increase contrast using CLAHE. This must run on the grayscale
+    # image: after thresholding there are only two levels left to equalize
+    contrasted = _get_clahe().apply(filtered)
     
-    # Step 3: Increase contrast using CLAHE
-    clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
-    enhanced = clahe.apply(adaptive_thresh)
+    # Step 3: Adaptive thresholding
+    enhanced = cv2.adaptiveThreshold(contrasted, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                     cv2.THRESH_BINARY, 11, 2)
     
     # Step 4: Resize plate ROI to at least 2x for better OCR
     # Calculate if we need upscaling
@@ -95,34 +165,22 @@ def enhance_plate_image(image):
                               interpolation=cv2.INTER_CUBIC)
     
     # Step 5: Sharpen edges for character clarity
-    kernel = np.array([[-1, -1, -1],
-                       [-1,  9, -1],
-                       [-1, -1, -1]], dtype=np.float32)
-    sharpened = cv2.filter2D(enhanced, -1, kernel)
+    sharpened = cv2.filter2D(enhanced, -1, _SHARPEN_KERNEL)
     
     return sharpened
 
 
-def extract_text_from_plate(plate_image):
+def _extract_text_tesseract(enhanced):
     """
-    Extract text from a license plate image using pytesseract or fallback methods.
-    
-    Attempts to extract text using:
-    1. pytesseract (primary method - requires tesseract system installation)
-    2. EasyOCR (fallback)
-    3. Contour-based fallback
+    Read an enhanced plate with pytesseract.
     
     Args:
-        plate_image: Image containing only the license plate
+        enhanced: Plate image from enhance_plate_image()
     
     Returns:
-        str: Detected text (uppercase alphanumeric), or empty string if detection fails
+        str: Cleaned text, or empty string if Tesseract is unavailable or
+             read nothing
     """
-    
-    # Enhance the plate image first
-    enhanced = enhance_plate_image(plate_image)
-    
-    # Try pytesseract first if available
     if PYTESSERACT_AVAILABLE:
         try:
             # Configure pytesseract for license plate recognition
@@ -137,7 +195,19 @@ def extract_text_from_plate(plate_image):
         except Exception as e:
             print(f"pytesseract error: {str(e)}. Trying alternative method.")
     
-    # Try EasyOCR as fallback
+    return ''
+
+
+def _extract_text_easyocr(plate_image):
+    """
+    Read a plate with EasyOCR.
+    
+    Args:
+        plate_image: Image containing only the license plate
+    
+    Returns:
+        str: Cleaned text, or empty string if EasyOCR is unavailable or read nothing
+    """
     if EASYOCR_AVAILABLE:
         try:
             reader = get_ocr_reader()
@@ -145,16 +215,124 @@ def extract_text_from_plate(plate_image):
                 results = reader.readtext(plate_image, detail=0)
                 if results:
                     extracted_text = ''.join(results)
-                    cleaned = cleanup_ocr_text(extracted_text)
-                    if cleaned:
-                        return cleaned
+                    return cleanup_ocr_text(extracted_text)
         except Exception as e:
             print(f"EasyOCR error: {str(e)}. Using contour fallback.")
     
+    return ''
+
+
+def extract_text_from_plate(plate_image, gray=None):
+    """
+    Extract text from a license plate image using pytesseract or fallback methods.
+    
+    Attempts to extract text using:
+    1. pytesseract (primary method - requires tesseract system installation)
+    2. EasyOCR (fallback)
+    3. Contour-based fallback
+    
+    Args:
+        plate_image: Image containing only the license plate
+        gray: Optional grayscale version of ``plate_image``, if the caller already has one
+    
+    Returns:
+        str: Detected text (uppercase alphanumeric), or empty string if detection fails
+    """
+    
+    # Enhance the plate image first
+    enhanced = enhance_plate_image(plate_image, gray=gray)
+    
+    # Try pytesseract first if available
+    cleaned = _extract_text_tesseract(enhanced)
+    if cleaned:
+        return cleaned
+    
+    # Try EasyOCR as fallback
+    cleaned = _extract_text_easyocr(plate_image)
+    if cleaned:
+        return cleaned
+    
     # Fallback: Use contour-based text extraction
     return _extract_text_fallback(enhanced)
 
 
+def _pad_to_common_size(images):
+    """
+    Pad images on the bottom and right to the largest height and width among them.
+    
+    Images keep their own scale and aspect ratio. The padding is filled with
+    each image's mean color, so it adds no edges that could read as text.
+    
+    Args:
+        images: List of images (all BGR or all grayscale)
+    
+    Returns:
+        list: Padded images, all the same shape
+    """
+    height = max(image.shape[0] for image in images)
+    width = max(image.shape[1] for image in images)
+    
+    return [
+        cv2.copyMakeBorder(image, 0, height - image.shape[0], 0, width - image.shape[1],
+                           cv2.BORDER_CONSTANT, value=cv2.mean(image))
+        for image in images
+    ]
+
+
+def extract_text_from_plates(plate_images, grays=None, executor=None):
+    """
+    Extract text from several license plate images at once.
+    
+    Runs the same stages as extract_text_from_plate(), but plates that
+    reach the EasyOCR stage are read with one batched call instead of one
+    call per plate. The batch is padded to a common size rather than
+    resized, so EasyOCR sees every plate at its own resolution and aspect
+    ratio; only the padding around a plate differs from a single read.
+    
+    Args:
+        plate_images: List of plate images
+        grays: Optional list of grayscale versions of ``plate_images``
+        executor: Optional concurrent.futures executor used to run the
+            per-plate Tesseract stage in parallel
+    
+    Returns:
+        list: Detected text per plate (empty string if detection fails)
+    """
+    if grays is None:
+        grays = [None] * len(plate_images)
+    enhanced_images = [enhance_plate_image(plate_image, gray=gray) for plate_image, gray in zip(plate_images, grays)]
+    
+    # Try pytesseract plate by plate
+    map_fn = executor.map if executor is not None else map
+    texts = list(map_fn(_extract_text_tesseract, enhanced_images))
+    
+    # Read every plate still missing text with a single EasyOCR batch
+    pending = [i for i, text in enumerate(texts) if not text]
+    batched = False
+    if len(pending) > 1 and EASYOCR_AVAILABLE:
+        try:
+            reader = get_ocr_reader()
+            if reader is not None:
+                batch_results = reader.readtext_batched(_pad_to_common_size([plate_images[i] for i in pending]),
+                                                        batch_size=len(pending), detail=0)
+                for i, results in zip(pending, batch_results):
+                    texts[i] = cleanup_ocr_text(''.join(results))
+                batched = True
+        except Exception as e:
+            print(f"EasyOCR batch error: {str(e)}. Reading plates one by one.")
+    
+    for i in pending:
+        # A single leftover plate (or a failed batch) is read on its own
+        if not batched:
+            texts[i] = _extract_text_easyocr(plate_images[i])
+        
+        # Fallback: Use contour-based text extraction
+        if not texts[i]:
+            texts[i] = _extract_text_fallback(enhanced_images[i])
+    
+    return texts
+
+
 def _extract_text_fallback(plate_image):
     """
     Fallback text extraction using contour analysis.
@@ -182,8 +360,7 @@ def _extract_text_fallback(plate_image):
             binary = cv2.bitwise_not(binary)
         
         # Remove noise using morphological operations
-        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
-        cleaned = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
+        cleaned = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, _MORPH_KERNEL)
         
         # Find contours of characters
         contours, _ = cv2.findContours(cleaned, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -191,40 +368,34 @@ def _extract_text_fallback(plate_image):
         if not contours:
             return ""
         
-        # Sort contours left to right
-        contours = sorted(contours, key=lambda c: cv2.boundingRect(c)[0])
+        # Bounding boxes (x, y, w, h) and areas of all contours, computed once
+        rects = np.array([cv2.boundingRect(contour) for contour in contours])
+        areas = np.array([cv2.contourArea(contour) for contour in contours])
         
-        # Extract character regions
-        character_boxes = []
-        for contour in contours:
-            area = cv2.contourArea(contour)
-            if area < 30:
-                continue
-            
-            x, y, w, h = cv2.boundingRect(contour)
-            
-            # Character height should be reasonable
-            if h < 10 or h > plate_image.shape[0] - 10:
-                continue
-            
-            character_boxes.append((x, y, w, h))
+        # Keep character-sized regions: large enough, with a reasonable height
+        heights = rects[:, 3]
+        keep = (areas >= 30) & (heights >= 10) & (heights <= plate_image.shape[0] - 10)
+        rects = rects[keep]
         
-        if not character_boxes:
+        if len(rects) == 0:
             return ""
         
+        # Sort character boxes left to right
+        rects = rects[np.argsort(rects[:, 0], kind='stable')]
+        
         # Generate placeholder text based on character count and shape
-        detected_text = ""
-        for x, y, w, h in character_boxes:
-            char_image = binary[y:y+h, x:x+w]
-            aspect_ratio = float(w) / h if h > 0 else 0
-            
-            if 0.2 < aspect_ratio < 0.8:
-                detected_text += "A"  # Likely a letter
-            else:
-                detected_text += "0"  # Likely a digit
+        aspect_ratios = rects[:, 2] / rects[:, 3]
+        is_letter = (aspect_ratios > 0.2) & (aspect_ratios < 0.8)
+        detected_text = ''.join(np.where(is_letter, 'A', '0'))  # Letter-like vs digit-like
         
         return detected_text
     
     except Exception as e:
         print(f"Error in fallback OCR: {str(e)}")
         return ""
+
+
+# Load the EasyOCR model in the background so the first plate does not pay
+# the model load latency
+if EASYOCR_AVAILABLE:
+    threading.Thread(target=get_ocr_reader, daemon=True).start()
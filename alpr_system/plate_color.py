@@ -9,6 +9,37 @@ import cv2
 import numpy as np
 
 
+# Plate crops larger than this many pixels are downsampled 4x per side
+# before color analysis; the background mode is stable from far fewer pixels
+_COLOR_ANALYSIS_MAX_PIXELS = 8192
+
+# HSV (lower, upper) bounds per background color for analyze_plate_background
+_BACKGROUND_HSV_RANGES = {
+    'yellow': (np.array([15, 100, 100]), np.array([35, 255, 255])),
+    'white': (np.array([0, 0, 150]), np.array([180, 50, 255])),
+    'red': (np.array([0, 100, 100]), np.array([10, 255, 255])),
+    'green': (np.array([35, 100, 100]), np.array([85, 255, 255])),
+    'blue': (np.array([100, 100, 100]), np.array([130, 255, 255])),
+}
+
+
+def _downsample_for_color(plate_image):
+    """
+    Shrink large plate crops 4x per side for color analysis.
+    
+    Args:
+        plate_image: Image of the license plate
+    
+    Returns:
+        np.ndarray: Downsampled image, or the input if it is small already
+    """
+    h, w = plate_image.shape[:2]
+    if h * w > _COLOR_ANALYSIS_MAX_PIXELS:
+        # Keep at least one pixel per side for thin crops
+        return cv2.resize(plate_image, (max(1, w // 4), max(1, h // 4)), interpolation=cv2.INTER_AREA)
+    return plate_image
+
+
 def get_plate_color(plate_image):
     """
     Determine the dominant color of a license plate using HSV color space.
@@ -19,16 +50,14 @@ def get_plate_color(plate_image):
     Returns:
         str: Color name (Yellow, White, Red, Green, Blue, etc.)
     """
-    # Convert BGR to HSV
-    hsv = cv2.cvtColor(plate_image, cv2.COLOR_BGR2HSV)
+    # Convert BGR to HSV (large crops are downsampled first)
+    hsv = cv2.cvtColor(_downsample_for_color(plate_image), cv2.COLOR_BGR2HSV)
     
-    # Calculate histogram for all 3 channels
-    h, s, v = cv2.split(hsv)
-    
-    # Get dominant values
-    h_mode = np.argmax(np.bincount(h.flatten()))
-    s_mode = np.argmax(np.bincount(s.flatten()))
-    v_mode = np.argmax(np.bincount(v.flatten()))
+    # Get dominant values from per-channel histograms (calcHist reads the
+    # channels in place, no split or flattened copies)
+    h_mode = int(cv2.calcHist([hsv], [0], None, [180], [0, 180]).argmax())
+    s_mode = int(cv2.calcHist([hsv], [1], None, [256], [0, 256]).argmax())
+    v_mode = int(cv2.calcHist([hsv], [2], None, [256], [0, 256]).argmax())
     
     # Classify color based on HSV values
     # H: 0-180 (hue), S: 0-255 (saturation), V: 0-255 (value)
@@ -96,27 +125,21 @@ def analyze_plate_background(plate_image):
         plate_image: Image of the license plate
     
     Returns:
-        dict: Background analysis results
+        dict: Background analysis results (pixel counts refer to the
+              downsampled image for large crops; percentages are unaffected)
     """
-    hsv = cv2.cvtColor(plate_image, cv2.COLOR_BGR2HSV)
-    
-    # Create masks for different colors
-    masks = {
-        'yellow': cv2.inRange(hsv, np.array([15, 100, 100]), np.array([35, 255, 255])),
-        'white': cv2.inRange(hsv, np.array([0, 0, 150]), np.array([180, 50, 255])),
-        'red': cv2.inRange(hsv, np.array([0, 100, 100]), np.array([10, 255, 255])),
-        'green': cv2.inRange(hsv, np.array([35, 100, 100]), np.array([85, 255, 255])),
-        'blue': cv2.inRange(hsv, np.array([100, 100, 100]), np.array([130, 255, 255])),
-    }
+    hsv = cv2.cvtColor(_downsample_for_color(plate_image), cv2.COLOR_BGR2HSV)
     
-    # Count pixels in each color range
-    pixel_counts = {color: np.sum(mask) // 255 for color, mask in masks.items()}
+    # Count pixels in each color range (countNonZero on the inRange mask
+    # is a single SIMD pass, no widening sum over the mask)
+    pixel_counts = {color: cv2.countNonZero(cv2.inRange(hsv, lower, upper))
+                    for color, (lower, upper) in _BACKGROUND_HSV_RANGES.items()}
     
     # Find dominant color
     dominant_color = max(pixel_counts, key=pixel_counts.get)
     
     # Calculate percentages
-    total_pixels = plate_image.shape[0] * plate_image.shape[1]
+    total_pixels = hsv.shape[0] * hsv.shape[1]
     percentages = {color: (count / total_pixels * 100) for color, count in pixel_counts.items()}
     
     return {
@@ -142,35 +165,60 @@ def get_plate_confidence(color):
     return high_confidence.get(color, 0.5)
 
 
-def detect_multiple_colors(plate_image):
+def detect_multiple_colors(plate_image, bins=32):
     """
     Detect multiple colors present in the plate image.
     Useful for multi-color plates or plates with text.
     
+    Each HSV channel is histogrammed into ``bins`` coarse bins; that is
+    plenty to locate the dominant colors and keeps the histograms small.
+    
     Args:
         plate_image: Image of the license plate
+        bins: Number of histogram bins per channel
     
     Returns:
-        dict: Color distribution information
+        dict: Color distribution information. Peaks are given in channel
+              units (lower edge of the peak bin, H 0-180, S/V 0-256) and as
+              raw bin indices (``*_peak_bins``); histograms have ``bins`` entries
     """
-    hsv = cv2.cvtColor(plate_image, cv2.COLOR_BGR2HSV)
-    h, s, v = cv2.split(hsv)
+    hsv = cv2.cvtColor(_downsample_for_color(plate_image), cv2.COLOR_BGR2HSV)
     
-    # Create histograms
-    h_hist = cv2.calcHist([h], [0], None, [180], [0, 180])
-    s_hist = cv2.calcHist([s], [0], None, [256], [0, 256])
-    v_hist = cv2.calcHist([v], [0], None, [256], [0, 256])
+    # Create histograms (flattened views, calcHist reads the channels in place)
+    h_hist = cv2.calcHist([hsv], [0], None, [bins], [0, 180]).ravel()
+    s_hist = cv2.calcHist([hsv], [1], None, [bins], [0, 256]).ravel()
+    v_hist = cv2.calcHist([hsv], [2], None, [bins], [0, 256]).ravel()
     
-    # Find peaks (dominant values)
-    h_peaks = np.argsort(h_hist.flatten())[-3:][::-1]
-    s_peaks = np.argsort(s_hist.flatten())[-3:][::-1]
-    v_peaks = np.argsort(v_hist.flatten())[-3:][::-1]
+    # Find peaks (dominant bins)
+    h_peaks = _top_peaks(h_hist)
+    s_peaks = _top_peaks(s_hist)
+    v_peaks = _top_peaks(v_hist)
     
     return {
-        'hue_peaks': h_peaks.tolist(),
-        'saturation_peaks': s_peaks.tolist(),
-        'value_peaks': v_peaks.tolist(),
-        'hue_histogram': h_hist.flatten().tolist(),
-        'saturation_histogram': s_hist.flatten().tolist(),
-        'value_histogram': v_hist.flatten().tolist()
+        'hue_peaks': (h_peaks * 180 // bins).tolist(),
+        'saturation_peaks': (s_peaks * 256 // bins).tolist(),
+        'value_peaks': (v_peaks * 256 // bins).tolist(),
+        'hue_peak_bins': h_peaks.tolist(),
+        'saturation_peak_bins': s_peaks.tolist(),
+        'value_peak_bins': v_peaks.tolist(),
+        'hue_histogram': h_hist.tolist(),
+        'saturation_histogram': s_hist.tolist(),
+        'value_histogram': v_hist.tolist()
     }
+
+
+def _top_peaks(hist, k=3):
+    """
+    Return the indices of the ``k`` largest histogram bins, largest first.
+    
+    Uses a partial selection (argpartition) instead of sorting every bin.
+    
+    Args:
+        hist: 1-D histogram
+        k: Number of peaks to return
+    
+    Returns:
+        np.ndarray: Bin indices of the peaks
+    """
+    idx = np.argpartition(hist, -k)[-k:]
+    return idx[np.argsort(-hist[idx], kind='stable')]
@@ -12,8 +12,39 @@ Date: January 2026
 """
 
 import re
+from functools import lru_cache
 
 
+# Compiled once at import; runs for every OCR result
+_VALID_PLATE_RE = re.compile(r'^[A-Z]{3}-[0-9]{3}[A-Z]{2}\Z')
+
+# Byte deletion tables for stripping unwanted characters. bytes.translate
+# is a plain table lookup, faster than a regex substitution on plate-sized
+# strings; non-ASCII characters are dropped when encoding
+_PLATE_CHARS = b'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+_DELETE_NON_ALNUM = bytes(c for c in range(256) if c not in _PLATE_CHARS)
+_DELETE_NON_ALNUM_HYPHEN = bytes(c for c in range(256) if c not in _PLATE_CHARS + b'-')
+
+
+# Context-aware OCR corrections: digits misread in letter positions and
+# letters misread in digit positions
+_LETTER_FIX = str.maketrans({'5': 'S', '8': 'B', '1': 'I', '0': 'O'})
+_DIGIT_FIX = str.maketrans({'O': '0', 'I': '1', 'S': '5', 'B': '8'})
+
+# correct_ocr_errors() tables for the digit section of a hyphenated plate
+# and for positions outside the plate sections
+_HYPHENATED_DIGIT_FIX = str.maketrans({'5': 'S', '8': 'B', 'O': '0'})
+_SEPARATOR_FIX = str.maketrans({'5': 'S', '8': 'B'})
+
+
+def _keep_only(text, delete_table):
+    """Return ``text`` with non-ASCII characters and those in ``delete_table`` removed."""
+    return text.encode('ascii', 'ignore').translate(None, delete_table).decode('ascii')
+
+
+# Results depend only on the input string, and the same OCR text recurs
+# across the frames of a video, so repeated calls are served from a cache
+@lru_cache(maxsize=4096)
 def normalize_plate(text):
     """
     Normalize Nigerian license plate text with OCR error correction.
@@ -40,11 +71,15 @@ def normalize_plate(text):
     Returns:
         str: Formatted plate text with hyphen, or original if wrong length
     """
+    # Already in AAA-123AA form: every step below would return it unchanged
+    if _VALID_PLATE_RE.match(text):
+        return text
+    
     # Step 1: Convert to uppercase
     text = text.upper()
     
     # Step 2: Remove all non-alphanumeric characters
-    text = re.sub(r'[^A-Z0-9]', '', text)
+    text = _keep_only(text, _DELETE_NON_ALNUM)
     
     # Step 3: If we don't have enough characters, return as-is
     if len(text) < 8:
@@ -59,36 +94,15 @@ def normalize_plate(text):
     
     # Correct letter prefix (positions 0-2)
     # Common OCR errors: 5→S, 8→B, 1→I, 0→O
-    letters_prefix = ''.join([
-        ('S' if c == '5' else 
-         'B' if c == '8' else 
-         'I' if c == '1' else 
-         'O' if c == '0' else 
-         c)
-        for c in letters_prefix
-    ])
+    letters_prefix = letters_prefix.translate(_LETTER_FIX)
     
     # Correct numbers (positions 3-5)
     # Common OCR errors: O→0, I→1, S→5, B→8
-    numbers = ''.join([
-        ('0' if c == 'O' else 
-         '1' if c == 'I' else 
-         '5' if c == 'S' else 
-         '8' if c == 'B' else 
-         c)
-        for c in numbers
-    ])
+    numbers = numbers.translate(_DIGIT_FIX)
     
     # Correct letter suffix (positions 6-7)
     # Same as prefix: 5→S, 8→B, 1→I, 0→O
-    letters_suffix = ''.join([
-        ('S' if c == '5' else 
-         'B' if c == '8' else 
-         'I' if c == '1' else 
-         'O' if c == '0' else 
-         c)
-        for c in letters_suffix
-    ])
+    letters_suffix = letters_suffix.translate(_LETTER_FIX)
     
     # Step 6: Format with hyphen
     return f"{letters_prefix}-{numbers}{letters_suffix}"
@@ -112,8 +126,7 @@ def is_valid_nigerian_plate(text):
     Returns:
         bool: True if valid Nigerian plate format
     """
-    pattern = r'^[A-Z]{3}-[0-9]{3}[A-Z]{2}$'
-    return bool(re.match(pattern, text))
+    return bool(_VALID_PLATE_RE.match(text))
 
 
 def normalize_plate_text(text):
@@ -133,11 +146,12 @@ def normalize_plate_text(text):
     text = text.replace(' ', '')
     
     # Keep only alphanumeric and hyphen
-    text = re.sub(r'[^A-Z0-9\-]', '', text)
+    text = _keep_only(text, _DELETE_NON_ALNUM_HYPHEN)
     
     return text
 
 
+@lru_cache(maxsize=4096)
 def correct_ocr_errors(text):
     """
     Correct common OCR errors in license plate text.
@@ -158,40 +172,21 @@ def correct_ocr_errors(text):
         return text
     
     text = text.upper()
-    result = list(text)
     
     # For Nigerian plates: AAA-###AA
     # Positions 0-2: letters (A)
     # Positions 4-6: digits (#)
     # Positions 7-8: letters (A)
     # Position 3: hyphen (-)
-    
-    # First, handle the basic replacements
-    # 5 → S (convert digit 5 to letter S)
-    # 8 → B (convert digit 8 to letter B)
-    for i in range(len(result)):
-        if result[i] == '5':
-            result[i] = 'S'
-        elif result[i] == '8':
-            result[i] = 'B'
-    
-    # Now handle 0/O context-aware correction
-    for i in range(len(result)):
-        if result[i] in ('0', 'O'):
-            # In digit positions (after hyphen): should be 0
-            if i >= 4 and i <= 6:
-                result[i] = '0'
-            # In letter positions: should be O
-            elif i in (0, 1, 2, 7, 8):
-                result[i] = 'O'
-    
-    # Handle 1/I in letter positions
-    for i in range(len(result)):
-        if result[i] == '1' and i in (0, 1, 2, 7, 8):
-            # Only correct if surrounded by letters or at word boundary
-            result[i] = 'I'
-    
-    return ''.join(result)
+    #
+    # One translation table per position class, applied to each section:
+    # 5 → S and 8 → B everywhere, 0/O → O and 1 → I in letter positions,
+    # 0/O → 0 in digit positions
+    return (text[:3].translate(_LETTER_FIX)
+            + text[3:4].translate(_SEPARATOR_FIX)
+            + text[4:7].translate(_HYPHENATED_DIGIT_FIX)
+            + text[7:9].translate(_LETTER_FIX)
+            + text[9:].translate(_SEPARATOR_FIX))
 
 
 def format_plate_with_hyphen(normalized_text):
@@ -219,6 +214,7 @@ def format_plate_with_hyphen(normalized_text):
     return formatted
 
 
+@lru_cache(maxsize=4096)
 def validate_and_format_plate(text):
     """
     Validate and format a Nigerian license plate.
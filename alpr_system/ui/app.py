@@ -8,10 +8,10 @@ Run with: streamlit run alpr_system/ui/app.py
 """
 
 import streamlit as st
-import cv2
 import numpy as np
-from PIL import Image
+import hashlib
 import os
+import re
 import tempfile
 from pathlib import Path
 
@@ -19,23 +19,8 @@ from pathlib import Path
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from alpr_system.main import run_alpr
-from alpr_system.utils import convert_bgr_to_rgb, is_image_file, is_video_file
-
-
-# ============================================================================
-# PAGE CONFIGURATION
-# ============================================================================
-
-st.set_page_config(
-    page_title="Nigerian ALPR System",
-    page_icon="🚗",
-    layout="wide",
-    initial_sidebar_state="collapsed"
-)
-
-# Custom CSS for professional styling
-st.markdown("""
+# Page styles, injected on every run
+_CSS = """
 <style>
     .main {
         padding: 2rem;
@@ -90,43 +75,165 @@ st.markdown("""
         border-left: 4px solid #007bff;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# Result fields shown as table columns when several plates are found
+_RESULT_COLUMNS = (
+    ('plate_number', 'Plate'),
+    ('registered', 'Registered'),
+    ('owner_name', 'Owner'),
+    ('state', 'State'),
+    ('vehicle_type', 'Vehicle'),
+    ('plate_color', 'Color'),
+    ('plate_type', 'Type'),
+    ('frame_number', 'Frame'),
+)
+
+# Markers in run_alpr() error messages, checked in this order
+_NO_PLATE_MESSAGE_RE = re.compile(r'no plate|not detected', re.IGNORECASE)
+_INVALID_MESSAGE_RE = re.compile(r'invalid', re.IGNORECASE)
+
+# Session state keys and their initial values
+_SESSION_DEFAULTS = (
+    ('uploaded_file', None),
+    ('uploaded_file_name', None),
+    ('uploaded_file_key', None),
+    ('upload_digest', None),
+    ('image_bytes', None),
+    ('image_array', None),
+    ('detection_results', None),
+    ('processed_image', None),
+    ('file_type', None),
+)
 
 
 # ============================================================================
-# SESSION STATE MANAGEMENT
+# PAGE CONFIGURATION
 # ============================================================================
 
-# Initialize session state variables
-if 'uploaded_file' not in st.session_state:
-    st.session_state.uploaded_file = None
+st.set_page_config(
+    page_title="Nigerian ALPR System",
+    page_icon="🚗",
+    layout="wide",
+    initial_sidebar_state="collapsed"
+)
 
-if 'uploaded_file_name' not in st.session_state:
-    st.session_state.uploaded_file_name = None
+# Custom CSS for professional styling. Streamlit rebuilds the page on every
+# rerun, so the style block has to be emitted each time
+st.markdown(_CSS, unsafe_allow_html=True)
 
-if 'detection_results' not in st.session_state:
-    st.session_state.detection_results = None
 
-if 'processed_image' not in st.session_state:
-    st.session_state.processed_image = None
+# ============================================================================
+# MODEL LOADING
+# ============================================================================
 
-if 'file_type' not in st.session_state:
-    st.session_state.file_type = None
+# Importing alpr_system pulls in Torch and Ultralytics, which takes seconds on
+# a cold start. Doing it after the page config, under a spinner, shows the
+# page instead of a blank tab; on reruns the modules are already cached
+with st.spinner("Loading detection models..."):
+    from alpr_system import detector, ocr
+    from alpr_system.main import run_alpr
+    from alpr_system.utils import convert_bgr_to_rgb, image_to_bytes, is_image_file, is_video_file, load_image_from_bytes
+
+
+@st.cache_resource(show_spinner="Loading detection models...")
+def load_models():
+    """
+    Load the YOLO detector and OCR reader once per server process.
+    
+    Both are cached inside alpr_system after the first load; calling this
+    on page load means the first detection does not pay the load time.
+    
+    Returns:
+        tuple: (YOLO model, EasyOCR reader or None)
+    """
+    return detector.get_yolo_model(), ocr.get_ocr_reader()
+
+
+load_models()
+
+
+# ============================================================================
+# SESSION STATE MANAGEMENT
+# ============================================================================
+
+# Initialize session state variables
+for key, default in _SESSION_DEFAULTS:
+    st.session_state.setdefault(key, default)
 
 
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
 
+def remove_temp_upload():
+    """Delete the current upload's temporary file, if there is one."""
+    # Only video uploads are spilled to disk; images stay in memory
+    if st.session_state.uploaded_file:
+        try:
+            os.remove(st.session_state.uploaded_file)
+        except OSError:
+            pass
+
+
 def clear_session():
     """Clear all session state variables to reset the UI."""
     st.session_state.uploaded_file = None
     st.session_state.uploaded_file_name = None
+    st.session_state.uploaded_file_key = None
+    st.session_state.upload_digest = None
+    st.session_state.image_bytes = None
+    st.session_state.image_array = None
     st.session_state.detection_results = None
     st.session_state.processed_image = None
     st.session_state.file_type = None
 
 
+@st.cache_data(show_spinner=False, max_entries=32)
+def _decode_upload(digest, _data):
+    """
+    Decode an uploaded image, cached on the upload's content hash.
+    
+    The leading underscore keeps Streamlit from hashing the raw bytes; the
+    digest already identifies them.
+    
+    Args:
+        digest: Content hash of the upload
+        _data: Encoded image bytes
+    
+    Returns:
+        np.ndarray: Image in BGR format, or None if decoding fails
+    """
+    return load_image_from_bytes(_data)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _run_alpr_cached(digest, _source):
+    """
+    Run the ALPR pipeline, cached on the upload's content hash.
+    
+    Detecting on the same file again (or re-uploading it) reuses the
+    earlier results instead of running the models again. Processing
+    errors (model load, out of memory) are not cached, so clicking
+    Detect again retries them.
+    
+    Args:
+        digest: Content hash of the upload
+        _source: Decoded image or path to the video
+    
+    Returns:
+        dict: Detection results from run_alpr()
+    
+    Raises:
+        RuntimeError: If run_alpr() reported a processing error
+    """
+    results = run_alpr(_source)
+    # st.cache_data only skips storing the value when the function raises
+    if results.get('error'):
+        raise RuntimeError(results['message'])
+    return results
+
+
 def display_plate_found(plate_data):
     """
     Display results when plate is found in database.
@@ -192,6 +299,21 @@ def display_plate_not_found(plate_number):
             st.write("🎨 **Plate Color:** Unknown")
 
 
+def display_results_table(plates):
+    """
+    Display several detected plates as a single table.
+    
+    Results are turned into columns once and rendered as one dataframe,
+    rather than as a set of widgets for every plate.
+    
+    Args:
+        plates: List of plate result dictionaries from run_alpr()
+    """
+    st.success(f"✅ {len(plates)} plates detected")
+    columns = {label: [plate.get(key) for plate in plates] for key, label in _RESULT_COLUMNS}
+    st.dataframe(columns, use_container_width=True)
+
+
 def display_no_plate_detected():
     """Display message when no plate is detected."""
     st.error("❌ No license plate detected in the image")
@@ -205,11 +327,17 @@ def display_invalid_plate():
 
 
 def display_detection_image(processed_image):
-    """Display the processed image with bounding boxes."""
+    """
+    Display the processed image with bounding boxes.
+    
+    Args:
+        processed_image: Image in BGR format, or already encoded image bytes
+    """
     if processed_image is not None:
         st.subheader("📸 Detected Image")
-        processed_rgb = convert_bgr_to_rgb(processed_image)
-        st.image(processed_rgb, use_container_width=True)
+        if isinstance(processed_image, np.ndarray):
+            processed_image = convert_bgr_to_rgb(processed_image)
+        st.image(processed_image, use_container_width=True)
 
 
 def display_results(results):
@@ -253,36 +381,57 @@ with left_col:
         help="Supported: JPG, PNG images or MP4, AVI videos"
     )
     
-    # Process uploaded file
+    # Process uploaded file. The uploader returns the same file on every
+    # rerun, so it is only decoded (images) or written to disk (videos)
+    # when a new upload arrives
+    upload_key = None
     if uploaded_file is not None:
+        upload_key = getattr(uploaded_file, 'file_id', None) or (uploaded_file.name, uploaded_file.size)
+    
+    if uploaded_file is not None and upload_key != st.session_state.uploaded_file_key:
         _, file_ext = os.path.splitext(uploaded_file.name)
         
-        # Save to temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as tmp:
-            tmp.write(uploaded_file.getbuffer())
-            temp_path = tmp.name
-        
-        st.session_state.uploaded_file = temp_path
-        st.session_state.uploaded_file_name = uploaded_file.name
+        # Remove the previous upload's temporary file
+        remove_temp_upload()
         
         # Determine file type
-        file_lower = uploaded_file.name.lower()
-        if any(file_lower.endswith(ext) for ext in ['.jpg', '.jpeg', '.png']):
+        if is_image_file(uploaded_file.name):
             st.session_state.file_type = 'image'
-        elif any(file_lower.endswith(ext) for ext in ['.mp4', '.avi', '.mov', '.mkv']):
+        elif is_video_file(uploaded_file.name):
             st.session_state.file_type = 'video'
+        
+        # Hash the raw bytes once; the digest keys the decode and detection caches
+        file_buffer = uploaded_file.getbuffer()
+        digest = hashlib.blake2b(file_buffer, digest_size=16).hexdigest()
+        st.session_state.upload_digest = digest
+        
+        if st.session_state.file_type == 'image':
+            # Decode images once in memory for the pipeline. The preview
+            # shows the original bytes, which the browser decodes anyway
+            st.session_state.uploaded_file = None
+            st.session_state.image_bytes = uploaded_file.getvalue()
+            st.session_state.image_array = _decode_upload(digest, st.session_state.image_bytes)
+        else:
+            # OpenCV needs a path to open videos, so save to temporary file
+            with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as tmp:
+                tmp.write(file_buffer)
+                st.session_state.uploaded_file = tmp.name
+            st.session_state.image_bytes = None
+            st.session_state.image_array = None
+        
+        st.session_state.uploaded_file_name = uploaded_file.name
+        st.session_state.uploaded_file_key = upload_key
     
     # Display preview
-    if st.session_state.uploaded_file and st.session_state.file_type:
+    if st.session_state.uploaded_file_name and st.session_state.file_type:
         st.subheader("👁️ Preview")
         
-        if st.session_state.file_type == 'image':
-            image = Image.open(st.session_state.uploaded_file)
-            st.image(image, use_container_width=True)
+        if st.session_state.file_type == 'video':
+            st.video(st.session_state.uploaded_file)
+        elif st.session_state.image_array is not None:
+            st.image(st.session_state.image_bytes, use_container_width=True)
         else:
-            video_file = open(st.session_state.uploaded_file, 'rb')
-            st.video(video_file)
-            video_file.close()
+            st.error("Could not read the uploaded image")
 
 
 # ============================================================================
@@ -310,24 +459,33 @@ with right_col:
     
     # Handle detect button
     if detect_btn:
-        if st.session_state.uploaded_file is None:
+        if st.session_state.file_type == 'image':
+            source = st.session_state.image_array
+        else:
+            source = st.session_state.uploaded_file
+        
+        if source is None:
             st.error("Please upload an image or video first")
         else:
             with st.spinner("🔄 Processing... Please wait..."):
                 try:
-                    results = run_alpr(st.session_state.uploaded_file)
+                    results = _run_alpr_cached(st.session_state.upload_digest, source)
                     st.session_state.detection_results = results
-                    st.session_state.processed_image = results.get('processed_image')
+                    # Encode the annotated BGR image once; reruns then show
+                    # the JPEG bytes without a color conversion or re-encode
+                    processed_image = results.get('processed_image')
+                    if processed_image is not None:
+                        processed_image = image_to_bytes(processed_image)
+                    st.session_state.processed_image = processed_image
                 except Exception as e:
+                    # Do not leave an earlier detection on screen as this file's result
+                    st.session_state.detection_results = None
+                    st.session_state.processed_image = None
                     st.error(f"Error during detection: {str(e)}")
     
     # Handle clear button
     if clear_btn:
-        if st.session_state.uploaded_file and os.path.exists(st.session_state.uploaded_file):
-            try:
-                os.remove(st.session_state.uploaded_file)
-            except:
-                pass
+        remove_temp_upload()
         clear_session()
         st.success("✅ Cleared! Ready for new upload")
         st.rerun()
@@ -344,12 +502,16 @@ if st.session_state.detection_results:
     results = st.session_state.detection_results
     
     # Display processed image
-    display_detection_image(results.get('processed_image'))
+    display_detection_image(st.session_state.processed_image)
     
     st.divider()
     
     # Handle different result scenarios
-    if results['success'] and results.get('results'):
+    if results['success'] and len(results.get('results', [])) > 1:
+        # Several plates (video): one table instead of a view per plate
+        display_results_table(results['results'])
+    
+    elif results['success'] and results.get('results'):
         # Plate was detected and found
         plate_data = results['results'][0]
         
@@ -367,14 +529,14 @@ if st.session_state.detection_results:
     elif not results['success']:
         # Error cases
         message = results.get('message', 'Unknown error')
-        if 'no plate' in message.lower() or 'not detected' in message.lower():
+        if _NO_PLATE_MESSAGE_RE.search(message):
             display_no_plate_detected()
-        elif 'invalid' in message.lower():
+        elif _INVALID_MESSAGE_RE.search(message):
             display_invalid_plate()
         else:
             st.error(f"❌ {message}")
 
-elif st.session_state.uploaded_file:
+elif st.session_state.uploaded_file_name:
     st.info("👆 Click 'Detect Plate' to start recognition")
 else:
     st.info("👈 Upload an image or video to begin")
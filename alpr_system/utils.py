@@ -3,7 +3,21 @@ import cv2
 import numpy as np
 from datetime import datetime
 import os
+import queue
 import tempfile
+import threading
+
+# PyAV is optional; when present, video frames can be sampled from keyframes
+# without decoding the frames in between
+try:
+    import av
+    PYAV_AVAILABLE = True
+except ImportError:
+    PYAV_AVAILABLE = False
+
+# File extensions (lowercase, with dot) recognised by is_image_file/is_video_file
+_IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tiff', '.webp'})
+_VIDEO_EXTENSIONS = frozenset({'.mp4', '.avi', '.mov', '.mkv', '.flv', '.wmv', '.webm'})
 
 
 def load_image(image_path):
@@ -30,8 +44,11 @@ def load_image_from_bytes(image_bytes):
     """
     Load an image from bytes (useful for file uploads in Streamlit).
     
+    The buffer is wrapped without copying, so a memoryview such as
+    ``uploaded_file.getbuffer()`` can be passed straight in.
+    
     Args:
-        image_bytes: Image data as bytes
+        image_bytes: Image data as bytes or any buffer (bytearray, memoryview)
     
     Returns:
         np.ndarray: Image in BGR format
@@ -129,6 +146,8 @@ def resize_image(image, max_width=800, max_height=600):
     """
     Resize image to fit within max dimensions while maintaining aspect ratio.
     
+    Images that already fit are returned as-is rather than copied.
+    
     Args:
         image: Input image
         max_width: Maximum width
@@ -145,6 +164,10 @@ def resize_image(image, max_width=800, max_height=600):
     new_w = int(w * scale)
     new_h = int(h * scale)
     
+    # Already within bounds: no resize (and no copy) needed
+    if (new_w, new_h) == (w, h):
+        return image
+    
     return cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_AREA)
 
 
@@ -189,37 +212,214 @@ def crop_image(image, x, y, w, h):
     return image[y:y+h, x:x+w]
 
 
-def extract_frames_from_video(video_path, frame_interval=30):
+def tile_image(image, tile_size=640, overlap=80):
+    """
+    Split an image into overlapping square tiles.
+    
+    Tiles step by ``tile_size - overlap`` and the last row/column is aligned
+    to the image edge, so every pixel is covered. Tiles are views into
+    ``image``, not copies.
+    
+    Args:
+        image: Input image
+        tile_size: Tile side length in pixels
+        overlap: Overlap between neighbouring tiles in pixels
+    
+    Returns:
+        list: List of (tile, (x_offset, y_offset)) tuples
+    """
+    h, w = image.shape[:2]
+    step = max(1, tile_size - overlap)
+    
+    def _starts(length):
+        if length <= tile_size:
+            return [0]
+        starts = list(range(0, length - tile_size, step))
+        starts.append(length - tile_size)
+        return starts
+    
+    return [
+        (image[y:y + tile_size, x:x + tile_size], (x, y))
+        for y in _starts(h)
+        for x in _starts(w)
+    ]
+
+
+def extract_frames_from_video(video_path, frame_interval=30, keyframes_only=False):
     """
     Extract frames from a video file.
     
     Args:
         video_path: Path to video file
         frame_interval: Extract every Nth frame (e.g., 30 = 30 fps = 1 frame per second)
+        keyframes_only: Decode only keyframes with PyAV when possible (see
+            iter_video_frames)
     
     Returns:
         list: List of frames (as numpy arrays)
+    
+    Note:
+        Holds every sampled frame in memory; prefer iter_video_frames() for
+        long videos. Skipped frames are grabbed but not decoded.
     """
+    frame_interval = max(1, int(frame_interval))
     frames = []
     try:
-        cap = cv2.VideoCapture(video_path)
+        source = _open_keyframe_source(video_path, frame_interval) if keyframes_only else None
+        if source is None:
+            source = _grab_every_nth_frame(video_path, frame_interval)
+        frames.extend(source)
+    except Exception as e:
+        print(f"Error extracting frames: {e}")
+    
+    return frames
+
+
+def _grab_every_nth_frame(video_path, frame_interval):
+    """
+    Yield every Nth frame with OpenCV; skipped frames are grabbed, not decoded.
+    
+    Args:
+        video_path: Path to video file
+        frame_interval: Yield every Nth frame
+    
+    Yields:
+        np.ndarray: Frames in BGR format
+    """
+    cap = cv2.VideoCapture(video_path)
+    try:
         frame_count = 0
-        
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
+        while cap.grab():
             if frame_count % frame_interval == 0:
-                frames.append(frame)
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                yield frame
             
             frame_count += 1
-        
+    finally:
         cap.release()
+
+
+def _open_keyframe_source(video_path, frame_interval):
+    """
+    Open a PyAV decoder that only decodes keyframes (I-frames).
+    
+    Inter frames are skipped inside the codec, so they cost no decode time.
+    Keyframes closer together than ``frame_interval`` frames are dropped so
+    intra-only codecs (every frame a keyframe) are not sampled more densely.
+    Nothing caps the spacing from above: with a long keyframe interval
+    (e.g. x264's default of 250 frames) samples are that far apart.
+    
+    Args:
+        video_path: Path to video file
+        frame_interval: Minimum spacing between yielded keyframes, in frames
+    
+    Returns:
+        generator: Keyframes in BGR format, or None if PyAV is unavailable,
+                   the file cannot be opened, or the stream has no constant
+                   average rate (variable frame rate)
+    """
+    if not PYAV_AVAILABLE:
+        return None
+    
+    try:
+        container = av.open(video_path)
     except Exception as e:
-        print(f"Error extracting frames: {e}")
+        print(f"PyAV could not open video, using OpenCV: {e}")
+        return None
     
-    return frames
+    if not container.streams.video or container.streams.video[0].average_rate is None:
+        container.close()
+        return None
+    
+    stream = container.streams.video[0]
+    stream.codec_context.skip_frame = 'NONKEY'
+    min_spacing = frame_interval / float(stream.average_rate)
+    
+    def _decode():
+        try:
+            next_time = None
+            for frame in container.decode(stream):
+                if frame.time is not None:
+                    if next_time is not None and frame.time < next_time:
+                        continue
+                    next_time = frame.time + min_spacing
+                yield frame.to_ndarray(format='bgr24')
+        finally:
+            container.close()
+    
+    return _decode()
+
+
+def iter_video_frames(video_path, frame_interval=30, queue_size=32, keyframes_only=False):
+    """
+    Yield sampled frames of a video, decoding ahead in a background thread.
+    
+    Frame decoding is I/O- and codec-bound, so a reader thread fills a bounded
+    queue while the caller runs detection/OCR on frames already decoded.
+    
+    By default every Nth frame is yielded; skipped frames are only grabbed,
+    never fully decoded. With ``keyframes_only`` (and PyAV installed) only
+    the video's keyframes are decoded instead, falling back to every Nth
+    frame for variable-frame-rate streams or when PyAV is unavailable.
+    Keyframes can be much further apart than ``frame_interval``, so this is
+    only suitable for videos known to have short keyframe intervals.
+    
+    Args:
+        video_path: Path to video file
+        frame_interval: Yield every Nth frame (e.g., 30 = 30 fps = 1 frame per second)
+        queue_size: Maximum number of decoded frames buffered ahead of the caller
+        keyframes_only: Sample keyframes instead of every Nth frame when possible
+    
+    Yields:
+        np.ndarray: Frames in BGR format
+    """
+    frame_interval = max(1, int(frame_interval))
+    frame_queue = queue.Queue(maxsize=queue_size)
+    stop_event = threading.Event()
+    end_of_stream = object()
+    
+    def _put(item):
+        # Block while the queue is full, but give up if the consumer went away
+        while not stop_event.is_set():
+            try:
+                frame_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def _reader():
+        source = None
+        try:
+            # Opened inside the try so a failing source still ends the stream
+            source = _open_keyframe_source(video_path, frame_interval) if keyframes_only else None
+            if source is None:
+                source = _grab_every_nth_frame(video_path, frame_interval)
+            
+            for frame in source:
+                if not _put(frame):
+                    break
+        except Exception as e:
+            print(f"Error extracting frames: {e}")
+        finally:
+            if source is not None:
+                source.close()
+            _put(end_of_stream)
+    
+    reader = threading.Thread(target=_reader, daemon=True)
+    reader.start()
+    
+    try:
+        while True:
+            frame = frame_queue.get()
+            if frame is end_of_stream:
+                break
+            yield frame
+    finally:
+        stop_event.set()
+        reader.join()
 
 
 def get_video_info(video_path):
@@ -279,19 +479,15 @@ def bytes_to_image(image_bytes):
     """
     Convert bytes to OpenCV image.
     
+    Counterpart of image_to_bytes(); same as load_image_from_bytes().
+    
     Args:
         image_bytes: Image as bytes
     
     Returns:
         np.ndarray: Image array or None
     """
-    try:
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        return img
-    except Exception as e:
-        print(f"Error converting bytes: {e}")
-        return None
+    return load_image_from_bytes(image_bytes)
 
 
 def image_to_bytes(image):
@@ -324,9 +520,11 @@ def save_temp_image(image, suffix='.jpg'):
         str: Path to temporary file
     """
     try:
-        temp_file = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
-        cv2.imwrite(temp_file.name, image)
-        return temp_file.name
+        # Close our handle before OpenCV reopens the path to write it
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as temp_file:
+            temp_path = temp_file.name
+        cv2.imwrite(temp_path, image)
+        return temp_path
     except Exception as e:
         print(f"Error saving temp image: {e}")
         return None
@@ -362,9 +560,7 @@ def is_image_file(filename):
     Returns:
         bool: True if image file
     """
-    image_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tiff', '.webp'}
-    _, ext = os.path.splitext(filename.lower())
-    return ext in image_extensions
+    return get_file_extension(filename) in _IMAGE_EXTENSIONS
 
 
 def is_video_file(filename):
@@ -377,9 +573,7 @@ def is_video_file(filename):
     Returns:
         bool: True if video file
     """
-    video_extensions = {'.mp4', '.avi', '.mov', '.mkv', '.flv', '.wmv', '.webm'}
-    _, ext = os.path.splitext(filename.lower())
-    return ext in video_extensions
+    return get_file_extension(filename) in _VIDEO_EXTENSIONS
 
 
 def get_file_extension(filename):
@@ -392,5 +586,5 @@ def get_file_extension(filename):
     Returns:
         str: File extension (with dot)
     """
-    _, ext = os.path.splitext(filename.lower())
-    return ext
+    # Lowercase only the extension, not the whole path
+    return os.path.splitext(filename)[1].lower()
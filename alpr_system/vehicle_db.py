@@ -156,6 +156,13 @@ VEHICLE_DATABASE = {
     },
 }
 
+# Database keys indexed by plate number without hyphens, built once at import.
+# The first key wins if two keys differ only in hyphens, as in a linear scan
+_KEYS_WITHOUT_HYPHENS = {}
+for _key in VEHICLE_DATABASE:
+    _KEYS_WITHOUT_HYPHENS.setdefault(_key.replace('-', ''), _key)
+del _key
+
 
 def lookup_vehicle(plate_number):
     """
@@ -176,12 +183,8 @@ def lookup_vehicle(plate_number):
         return VEHICLE_DATABASE[plate_number]
     
     # Try without hyphen
-    plate_no_hyphen = plate_number.replace('-', '')
-    for key in VEHICLE_DATABASE:
-        if key.replace('-', '') == plate_no_hyphen:
-            return VEHICLE_DATABASE[key]
-    
-    return None
+    key = _KEYS_WITHOUT_HYPHENS.get(plate_number.replace('-', ''))
+    return VEHICLE_DATABASE.get(key) if key is not None else None
 
 
 def is_plate_registered(plate_number):
@@ -204,10 +207,4 @@ def get_all_vehicles():
     Returns:
         list: List of all vehicle records
     """
-    results = []
-    for plate, info in VEHICLE_DATABASE.items():
-        results.append({
-            'plate_number': plate,
-            **info
-        })
-    return results
+    return [{'plate_number': plate, **info} for plate, info in VEHICLE_DATABASE.items()]
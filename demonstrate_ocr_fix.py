@@ -9,7 +9,10 @@ This script shows how the improved OCR pipeline correctly handles:
 """
 
 import sys
-sys.path.insert(0, '/workspaces/sturdy-computing-machine')
+from pathlib import Path
+
+# Import alpr_system from this checkout, wherever it lives
+sys.path.insert(0, str(Path(__file__).parent))
 
 from alpr_system.plate_validation_updated import (
     normalize_plate,
@@ -17,12 +20,13 @@ from alpr_system.plate_validation_updated import (
     validate_and_format_plate
 )
 
+# Rule printed above and below each section title
+_BAR = "=" * 70
+
 
 def print_header(title):
     """Print a formatted header."""
-    print("\n" + "="*70)
-    print(f"  {title}")
-    print("="*70)
+    print(f"\n{_BAR}\n  {title}\n{_BAR}")
 
 
 def test_plate(raw_text, description):
@@ -31,9 +35,8 @@ def test_plate(raw_text, description):
     is_valid = is_valid_nigerian_plate(normalized)
     
     status = "✓ VALID" if is_valid else "✗ INVALID"
-    print(f"\n{status}: {description}")
-    print(f"  Input:      {raw_text:20} → ", end="")
-    print(f"{normalized:15} (Valid: {is_valid})")
+    print(f"\n{status}: {description}\n"
+          f"  Input:      {raw_text:20} → {normalized:15} (Valid: {is_valid})")
     
     return is_valid
 
@@ -6,7 +6,10 @@ Tests the enhanced preprocessing pipeline and error correction logic.
 """
 
 import sys
-sys.path.insert(0, '/workspaces/sturdy-computing-machine')
+from pathlib import Path
+
+# Import alpr_system from this checkout, wherever it lives
+sys.path.insert(0, str(Path(__file__).parent))
 
 from alpr_system.plate_validation_updated import (
     normalize_plate,
@@ -47,10 +50,10 @@ def test_normalize_plate():
             passed += 1
         else:
             failed += 1
-        print(f"{status}: {description}")
-        print(f"  Input:    '{input_text}'")
-        print(f"  Expected: '{expected}'")
-        print(f"  Got:      '{result}'")
+        print(f"{status}: {description}\n"
+              f"  Input:    '{input_text}'\n"
+              f"  Expected: '{expected}'\n"
+              f"  Got:      '{result}'")
     
     print(f"\nTest Results: {passed} passed, {failed} failed")
     return failed == 0
@@ -80,10 +83,10 @@ def test_ocr_error_correction():
             passed += 1
         else:
             failed += 1
-        print(f"{status}: {description}")
-        print(f"  Input:    '{input_text}'")
-        print(f"  Expected: '{expected}'")
-        print(f"  Got:      '{result}'")
+        print(f"{status}: {description}\n"
+              f"  Input:    '{input_text}'\n"
+              f"  Expected: '{expected}'\n"
+              f"  Got:      '{result}'")
     
     print(f"\nTest Results: {passed} passed, {failed} failed")
     return failed == 0
@@ -118,10 +121,10 @@ def test_validation():
             passed += 1
         else:
             failed += 1
-        print(f"{status}: {description}")
-        print(f"  Input:    '{input_text}'")
-        print(f"  Expected: {expected_valid}")
-        print(f"  Got:      {result}")
+        print(f"{status}: {description}\n"
+              f"  Input:    '{input_text}'\n"
+              f"  Expected: {expected_valid}\n"
+              f"  Got:      {result}")
     
     print(f"\nTest Results: {passed} passed, {failed} failed")
     return failed == 0
@@ -162,10 +165,10 @@ def test_full_pipeline():
         else:
             failed += 1
         
-        print(f"{status}: {description}")
-        print(f"  Input:           '{input_text}'")
-        print(f"  Expected Valid:  {expected_valid}, Got: {is_valid}")
-        print(f"  Expected Output: '{expected_output}', Got: '{formatted}'")
+        print(f"{status}: {description}\n"
+              f"  Input:           '{input_text}'\n"
+              f"  Expected Valid:  {expected_valid}, Got: {is_valid}\n"
+              f"  Expected Output: '{expected_output}', Got: '{formatted}'")
     
     print(f"\nTest Results: {passed} passed, {failed} failed")
     return failed == 0
@@ -198,10 +201,10 @@ def test_ocr_error_scenarios():
         else:
             failed += 1
         
-        print(f"{status}: {description}")
-        print(f"  Input:    '{input_text}'")
-        print(f"  Expected: '{expected}'")
-        print(f"  Got:      '{result}'")
+        print(f"{status}: {description}\n"
+              f"  Input:    '{input_text}'\n"
+              f"  Expected: '{expected}'\n"
+              f"  Got:      '{result}'")
     
     print(f"\nTest Results: {passed} passed, {failed} failed")
     return failed == 0
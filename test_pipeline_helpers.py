@@ -0,0 +1,531 @@
+#!/usr/bin/env python3
+"""
+Test suite for the ALPR pipeline helpers that decide what reaches YOLO and OCR.
+
+Uses synthetic images only, so no detection model or OCR engine is needed.
+
+Run with: python test_pipeline_helpers.py
+"""
+
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+# Import alpr_system from this checkout, wherever it lives
+sys.path.insert(0, str(Path(__file__).parent))
+
+import cv2
+import numpy as np
+import torch
+
+from alpr_system import detector, ocr, utils
+from alpr_system import main as alpr_main
+
+
+def _static_scene(rng, width=800, height=600):
+    """Return a smooth, textured BGR scene standing in for a fixed camera view."""
+    noise = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    return cv2.normalize(cv2.GaussianBlur(noise, (0, 0), 6), None, 0, 255, cv2.NORM_MINMAX)
+
+
+def _add_noise(image, rng, sigma=6):
+    """Return a copy of ``image`` with Gaussian sensor noise added."""
+    return np.clip(image + rng.normal(0, sigma, image.shape), 0, 255).astype(np.uint8)
+
+
+def test_distinct_frames():
+    """Test that frame skipping drops repeats but keeps newly arrived vehicles."""
+    print("\n" + "="*70)
+    print("TEST 1: _iter_distinct_frames() - Static Scenes and New Vehicles")
+    print("="*70)
+
+    rng = np.random.default_rng(0)
+    scene = _static_scene(rng)
+
+    passed = 0
+    failed = 0
+
+    # A static scene with sensor noise only needs its first frame
+    frames = [scene] + [_add_noise(scene, rng) for _ in range(5)]
+    kept = [frame_idx for frame_idx, _ in alpr_main._iter_distinct_frames(frames)]
+    status = "✓ PASS" if kept == [0] else "✗ FAIL"
+    if kept == [0]:
+        passed += 1
+    else:
+        failed += 1
+    print(f"{status}: Noisy static scene keeps only the first frame\n"
+          f"  Expected: [0]\n"
+          f"  Got:      {kept}")
+
+    # A vehicle-sized patch (with a bright plate-like strip) entering the
+    # static scene must always reach detection
+    for width, height in ((200, 120), (120, 80)):
+        missed = 0
+        for _ in range(50):
+            x = int(rng.integers(0, scene.shape[1] - width))
+            y = int(rng.integers(0, scene.shape[0] - height))
+            arrival = scene.copy()
+            arrival[y:y + height, x:x + width] = rng.integers(0, 256, 3)
+            arrival[y + height // 3:y + 2 * height // 3, x + width // 4:x + 3 * width // 4] = 255
+
+            kept = [frame_idx for frame_idx, _ in alpr_main._iter_distinct_frames([scene, arrival])]
+            if kept != [0, 1]:
+                missed += 1
+
+        status = "✓ PASS" if missed == 0 else "✗ FAIL"
+        if missed == 0:
+            passed += 1
+        else:
+            failed += 1
+        print(f"{status}: {width}x{height} vehicle entering a static scene is kept\n"
+              f"  Missed:   {missed}/50 placements")
+
+    print(f"\nTest Results: {passed} passed, {failed} failed")
+    assert failed == 0, f"{failed} frame skipping case(s) failed"
+
+
+def test_tile_image():
+    """Test that tiles cover the whole image and end flush with its edges."""
+    print("\n" + "="*70)
+    print("TEST 2: tile_image() - Coverage and Edge Alignment")
+    print("="*70)
+
+    passed = 0
+    failed = 0
+
+    for height, width in ((2560, 1920), (1280, 1280), (1500, 700), (500, 400)):
+        image = np.zeros((height, width, 3), dtype=np.uint8)
+        tiles = utils.tile_image(image, tile_size=640, overlap=80)
+
+        coverage = np.zeros((height, width), dtype=bool)
+        in_bounds = True
+        for tile, (x, y) in tiles:
+            in_bounds &= x >= 0 and y >= 0 and x + tile.shape[1] <= width and y + tile.shape[0] <= height
+            coverage[y:y + tile.shape[0], x:x + tile.shape[1]] = True
+
+        # The last row/column of tiles ends exactly at the image edge, and
+        # every tile is full size unless the image is smaller than a tile
+        right = max(x + tile.shape[1] for tile, (x, _) in tiles)
+        bottom = max(y + tile.shape[0] for tile, (_, y) in tiles)
+        full_size = all(tile.shape[:2] == (min(640, height), min(640, width)) for tile, _ in tiles)
+
+        ok = coverage.all() and in_bounds and right == width and bottom == height and full_size
+        status = "✓ PASS" if ok else "✗ FAIL"
+        if ok:
+            passed += 1
+        else:
+            failed += 1
+        print(f"{status}: {width}x{height} image, {len(tiles)} tiles\n"
+              f"  Covered:  {coverage.mean():.1%}, right edge {right}/{width}, bottom edge {bottom}/{height}\n"
+              f"  Full-size tiles: {full_size}")
+
+    print(f"\nTest Results: {passed} passed, {failed} failed")
+    assert failed == 0, f"{failed} tiling case(s) failed"
+
+
+class _FakeBoxes:
+    """Stand-in for Ultralytics ``Boxes`` holding [x1, y1, x2, y2, conf, cls] rows."""
+
+    def __init__(self, rows):
+        self.data = torch.tensor(rows, dtype=torch.float32).reshape(-1, 6)
+
+    def __len__(self):
+        return len(self.data)
+
+
+class _FakeResult:
+    """Stand-in for an Ultralytics ``Results`` object."""
+
+    def __init__(self, rows):
+        self.boxes = _FakeBoxes(rows)
+
+
+def test_tiled_box_merge():
+    """Test tile box offsets, NMS merging and whole-image precedence."""
+    print("\n" + "="*70)
+    print("TEST 3: Tiled Detection - Box Offsets and Merging")
+    print("="*70)
+
+    passed = 0
+    failed = 0
+
+    def check(ok, description, details):
+        nonlocal passed, failed
+        status = "✓ PASS" if ok else "✗ FAIL"
+        if ok:
+            passed += 1
+        else:
+            failed += 1
+        print(f"{status}: {description}\n  {details}")
+
+    # Tile boxes are shifted by the tile offset; overview boxes are scaled up
+    rows = np.array([[10, 20, 110, 50, 0.9, 0]], dtype=np.float32)
+    shifted = detector._map_boxes(rows, (560, 1120))
+    scaled = detector._map_boxes(rows, (0, 0), 4.0)
+    check(shifted[0].tolist() == [570, 1140, 670, 1170, rows[0, 4]]
+          and scaled[0, :4].tolist() == [40, 80, 440, 200],
+          "Boxes map onto the full image",
+          f"Shifted: {shifted[0, :4].tolist()}, Scaled: {scaled[0, :4].tolist()}")
+
+    # The same plate seen by two overlapping tiles is kept once, at the
+    # higher confidence; a separate plate is kept as well
+    rows = np.array([[600, 100, 700, 130, 0.6],
+                     [602, 101, 701, 131, 0.8],
+                     [100, 400, 200, 430, 0.7]], dtype=np.float32)
+    boxes, confidences = detector._merge_detections(rows)
+    check(len(boxes) == 2 and confidences.tolist() == [rows[1, 4], rows[2, 4]],
+          "Duplicate tile boxes merge with NMS",
+          f"Kept confidences: {confidences.tolist()}")
+
+    # Pieces of a plate the whole-image pass found are dropped
+    plate = np.array([[100, 100, 1300, 400, 0.7]], dtype=np.float32)
+    pieces = np.array([[100, 100, 640, 400, 0.9],
+                       [1500, 1500, 1600, 1530, 0.5]], dtype=np.float32)
+    kept = detector._drop_fragments(pieces, plate)
+    check(kept[:, :4].tolist() == [[1500, 1500, 1600, 1530]],
+          "Tile pieces of a whole-image box are dropped",
+          f"Kept: {kept[:, :4].tolist()}")
+
+    # End to end with a fake model: a plate wider than a tile is returned
+    # whole, and no inference call exceeds the engine's batch limit
+    image = np.zeros((2560, 1920, 3), dtype=np.uint8)
+    overview_scale = 1920 / utils.resize_image(image, 640, 640).shape[1]
+    tile_offsets = iter([offset for _, offset in utils.tile_image(image)])
+    plate_box = (200, 1000, 1400, 1300)
+    batch_sizes = []
+
+    def fake_inference(source, conf=0.3):
+        if not isinstance(source, list):
+            # Whole-image pass: the plate, in overview coordinates
+            return [_FakeResult([[v / overview_scale for v in plate_box] + [0.6, 0]])]
+        batch_sizes.append(len(source))
+
+        # Each tile sees the piece of the plate inside it, more confidently
+        results = []
+        for tile in source:
+            x, y = next(tile_offsets)
+            x1, y1 = max(plate_box[0], x), max(plate_box[1], y)
+            x2, y2 = min(plate_box[2], x + tile.shape[1]), min(plate_box[3], y + tile.shape[0])
+            rows = [[x1 - x, y1 - y, x2 - x, y2 - y, 0.95, 0]] if x1 < x2 and y1 < y2 else []
+            results.append(_FakeResult(rows))
+        return results
+
+    real_inference = detector._run_inference
+    detector._run_inference = fake_inference
+    try:
+        _, bounding_box = detector.detect_plate_region_tiled(image)
+    finally:
+        detector._run_inference = real_inference
+
+    check(bounding_box is not None and abs(bounding_box[0] - 195) <= 2 and abs(bounding_box[2] - 1210) <= 2
+          and max(batch_sizes) <= detector.DEFAULT_BATCH_SIZE,
+          "Plate larger than a tile is detected whole, in engine-sized batches",
+          f"Box: {bounding_box}, batch sizes: {batch_sizes}")
+
+    print(f"\nTest Results: {passed} passed, {failed} failed")
+    assert failed == 0, f"{failed} tiled detection case(s) failed"
+
+
+def _render_plate(text):
+    """Render ``text`` on a plain white plate, the same template for every plate."""
+    plate = np.full((50, 160, 3), 255, dtype=np.uint8)
+    cv2.rectangle(plate, (1, 1), (158, 48), (0, 0, 0), 2)
+    cv2.putText(plate, text, (8, 34), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2)
+    return plate
+
+
+def test_video_plate_tracks():
+    """Test that distinct plates in a video are reported separately."""
+    print("\n" + "="*70)
+    print("TEST 4: _process_video() - Distinct Plates in One Video")
+    print("="*70)
+
+    rng = np.random.default_rng(1)
+
+    # (plate text, bounding box) per sampled frame: plate A moves across two
+    # frames, then plates B and C appear elsewhere. All three plates share
+    # one template, so their crops look alike
+    script = [
+        ('ABC-123DE', (100, 400, 160, 50)),
+        ('ABC-123DE', (112, 402, 160, 50)),
+        ('KJA-987XY', (500, 420, 160, 50)),
+        ('LND-402MM', (300, 100, 160, 50)),
+    ]
+    crops = [_render_plate(text) for text, _ in script]
+    plate_texts = {crop.tobytes(): text for crop, (text, _) in zip(crops, script)}
+    frames = [rng.integers(0, 256, (600, 800, 3), dtype=np.uint8) for _ in script]
+    detections = iter(zip(crops, (box for _, box in script)))
+    ocr_reads = []
+
+    def fake_detect(images):
+        return [next(detections) for _ in images]
+
+    def fake_ocr(plates, grays=None, executor=None):
+        ocr_reads.extend(plate_texts[plate.tobytes()] for plate in plates)
+        return [plate_texts[plate.tobytes()] for plate in plates]
+
+    patches = [
+        (utils, 'get_video_info', lambda path: {'fps': 1}),
+        (utils, 'iter_video_frames', lambda path, frame_interval: iter(frames)),
+        (detector, 'detect_plate_regions_batch', fake_detect),
+        (ocr, 'has_text_texture', lambda gray: True),
+        (ocr, 'extract_text_from_plates', fake_ocr),
+    ]
+    originals = [(module, name, getattr(module, name)) for module, name, _ in patches]
+    for module, name, replacement in patches:
+        setattr(module, name, replacement)
+    try:
+        result = alpr_main._process_video('video.mp4', batch_size=2)
+    finally:
+        for module, name, original in originals:
+            setattr(module, name, original)
+
+    plates = [r['plate_number'] for r in result['results']]
+    expected = ['ABC-123DE', 'KJA-987XY', 'LND-402MM']
+
+    passed = 0
+    failed = 0
+
+    ok = plates == expected
+    status = "✓ PASS" if ok else "✗ FAIL"
+    if ok:
+        passed += 1
+    else:
+        failed += 1
+    print(f"{status}: Three distinct plates give three results\n"
+          f"  Expected: {expected}\n"
+          f"  Got:      {plates}")
+
+    # Plate A, seen in two consecutive frames, is read once
+    ok = sorted(ocr_reads) == expected
+    status = "✓ PASS" if ok else "✗ FAIL"
+    if ok:
+        passed += 1
+    else:
+        failed += 1
+    print(f"{status}: A plate tracked across frames is OCR'd once\n"
+          f"  OCR reads: {ocr_reads}")
+
+    # A plate tracked over many frames keeps copies of its crops and of one
+    # frame, not views that hold every decoded frame in memory
+    clusters = []
+    track_frames = [rng.integers(0, 256, (600, 800, 3), dtype=np.uint8) for _ in range(6)]
+    for frame_seq, frame in enumerate(track_frames):
+        box = (100, 400, 120 + 10 * frame_seq, 40)
+        plate_region = frame[400:440, 100:box[0] + box[2]]
+        alpr_main._add_to_plate_cluster(clusters, (frame_seq, frame, plate_region, box), frame_seq)
+
+    arrays = [crop for _, crop, _ in clusters[0]['candidates']] + [clusters[0]['frame'][1]]
+    shared = sum(np.shares_memory(array, frame) for array in arrays for frame in track_frames)
+    ok = len(clusters) == 1 and shared == 0 and clusters[0]['frame'][0] == 5
+    status = "✓ PASS" if ok else "✗ FAIL"
+    if ok:
+        passed += 1
+    else:
+        failed += 1
+    print(f"{status}: Plate tracks hold copies, not views into decoded frames\n"
+          f"  Tracks: {len(clusters)}, arrays sharing frame memory: {shared}")
+
+    print(f"\nTest Results: {passed} passed, {failed} failed")
+    assert failed == 0, f"{failed} video plate case(s) failed"
+
+
+class _PixelExactReader:
+    """
+    Stand-in EasyOCR reader that only reads plates shown at their native size.
+    
+    A plate is recognised when its exact pixels sit in the top-left corner
+    of the image, so any resizing of the crop makes it unreadable.
+    """
+
+    def __init__(self, plates):
+        self.plates = plates
+
+    def _read(self, image):
+        for text, plate in self.plates.items():
+            h, w = plate.shape[:2]
+            if image.shape[:2] >= (h, w) and np.array_equal(image[:h, :w], plate):
+                return [text]
+        return []
+
+    def readtext(self, image, detail=1):
+        return self._read(image)
+
+    def readtext_batched(self, images, n_width=None, n_height=None, batch_size=1, detail=1):
+        # Like EasyOCR: resize to (n_width, n_height) if given, and the batch
+        # must then hold images of a single size
+        if n_width is not None and n_height is not None:
+            images = [cv2.resize(image, (n_width, n_height)) for image in images]
+        if len({image.shape for image in images}) != 1:
+            raise ValueError("images in a batch must all have the same size")
+        return [self._read(image) for image in images]
+
+
+def test_batched_ocr():
+    """Test that batched plate OCR reads the same text as per-plate OCR."""
+    print("\n" + "="*70)
+    print("TEST 5: extract_text_from_plates() - Batched vs Per-Plate OCR")
+    print("="*70)
+
+    passed = 0
+    failed = 0
+
+    # Plates of different sizes and aspect ratios
+    texts = ['ABC-123DE', 'KJA-987XY', 'LND-402MM']
+    plates = {
+        text: cv2.resize(_render_plate(text), size)
+        for text, size in zip(texts, ((160, 50), (240, 60), (120, 60)))
+    }
+    plate_images = list(plates.values())
+
+    # EasyOCR stage with a reader that fails on resized crops
+    patches = [
+        (ocr, 'PYTESSERACT_AVAILABLE', False),
+        (ocr, 'EASYOCR_AVAILABLE', True),
+        (ocr, 'get_ocr_reader', lambda: _PixelExactReader(plates)),
+    ]
+    originals = [(module, name, getattr(module, name)) for module, name, _ in patches]
+    for module, name, replacement in patches:
+        setattr(module, name, replacement)
+    try:
+        batched = ocr.extract_text_from_plates(plate_images)
+        single = [ocr.extract_text_from_plate(plate) for plate in plate_images]
+    finally:
+        for module, name, original in originals:
+            setattr(module, name, original)
+
+    expected = [text.replace('-', '') for text in texts]
+    ok = batched == single == expected
+    status = "✓ PASS" if ok else "✗ FAIL"
+    if ok:
+        passed += 1
+    else:
+        failed += 1
+    print(f"{status}: EasyOCR batch sees each plate at its native size\n"
+          f"  Expected:  {expected}\n"
+          f"  Batched:   {batched}\n"
+          f"  Per-plate: {single}")
+
+    # Whatever OCR engines are installed here
+    batched = ocr.extract_text_from_plates(plate_images)
+    single = [ocr.extract_text_from_plate(plate) for plate in plate_images]
+    ok = batched == single
+    status = "✓ PASS" if ok else "✗ FAIL"
+    if ok:
+        passed += 1
+    else:
+        failed += 1
+    print(f"{status}: Installed OCR engines agree between the two paths\n"
+          f"  Batched:   {batched}\n"
+          f"  Per-plate: {single}")
+
+    print(f"\nTest Results: {passed} passed, {failed} failed")
+    assert failed == 0, f"{failed} batched OCR case(s) failed"
+
+
+def test_video_frame_reader():
+    """Test that the background frame reader samples every Nth frame and always ends."""
+    print("\n" + "="*70)
+    print("TEST 6: iter_video_frames() - Sampling and Reader Errors")
+    print("="*70)
+
+    passed = 0
+    failed = 0
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # 3 s at 25 fps; each frame is filled with its own index
+        video_path = os.path.join(temp_dir, 'clip.avi')
+        writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'MJPG'), 25, (160, 120))
+        for i in range(75):
+            writer.write(np.full((120, 160, 3), i * 3, dtype=np.uint8))
+        writer.release()
+
+        # One frame per second by default
+        sampled = [int(round(frame.mean() / 3)) for frame in utils.iter_video_frames(video_path, frame_interval=25)]
+        ok = sampled == [0, 25, 50]
+        status = "✓ PASS" if ok else "✗ FAIL"
+        if ok:
+            passed += 1
+        else:
+            failed += 1
+        print(f"{status}: Every 25th frame is sampled\n"
+              f"  Expected: [0, 25, 50]\n"
+              f"  Got:      {sampled}")
+
+        # A keyframe source that fails to open must still end the stream,
+        # not leave the consumer waiting for frames forever
+        def failing_source(path, frame_interval):
+            raise RuntimeError("codec option not supported")
+
+        original = utils._open_keyframe_source
+        utils._open_keyframe_source = failing_source
+        try:
+            consumer = threading.Thread(
+                target=lambda: list(utils.iter_video_frames(video_path, frame_interval=25, keyframes_only=True)),
+                daemon=True)
+            consumer.start()
+            consumer.join(timeout=10)
+        finally:
+            utils._open_keyframe_source = original
+
+        ok = not consumer.is_alive()
+        status = "✓ PASS" if ok else "✗ FAIL"
+        if ok:
+            passed += 1
+        else:
+            failed += 1
+        print(f"{status}: A failing keyframe source ends the stream")
+
+    print(f"\nTest Results: {passed} passed, {failed} failed")
+    assert failed == 0, f"{failed} frame reader case(s) failed"
+
+
+def main():
+    """Run all tests."""
+    print("\n" + "="*70)
+    print("ALPR SYSTEM - PIPELINE HELPER TEST SUITE")
+    print("="*70)
+
+    results = []
+
+    # Run all test suites; a failing suite does not stop the ones after it
+    for test_name, test in (
+        ("Distinct Frames", test_distinct_frames),
+        ("Tile Image", test_tile_image),
+        ("Tiled Box Merge", test_tiled_box_merge),
+        ("Video Plate Tracks", test_video_plate_tracks),
+        ("Batched OCR", test_batched_ocr),
+        ("Video Frame Reader", test_video_frame_reader),
+    ):
+        try:
+            test()
+            results.append((test_name, True))
+        except AssertionError:
+            results.append((test_name, False))
+
+    # Summary
+    print("\n" + "="*70)
+    print("TEST SUMMARY")
+    print("="*70)
+
+    total_passed = sum(1 for _, passed in results if passed)
+    total_suites = len(results)
+
+    for test_name, passed in results:
+        status = "✓ PASSED" if passed else "✗ FAILED"
+        print(f"{status}: {test_name}")
+
+    print(f"\nTotal: {total_passed}/{total_suites} test suites passed")
+
+    if total_passed == total_suites:
+        print("\n✓ All tests passed!")
+        return 0
+    else:
+        print(f"\n✗ {total_suites - total_passed} test suite(s) failed. Review the output above.")
+        return 1
+
+
+if __name__ == "__main__":
+    exit(main())